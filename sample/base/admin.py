@@ -3,20 +3,21 @@ from django.urls import path
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from .models import Profile, PDFUpload, QuizAttempt, UserPreferences, Achievement, GeneratedMCQ
+from .models import Profile, PDFUpload, QuizAttempt, UserPreferences, Achievement, GeneratedMCQ, IngestionJob
 from .views import extract_mcqs_from_pdf
 
 @admin.register(GeneratedMCQ)
 class GeneratedMCQAdmin(admin.ModelAdmin):
     list_display = ['topic', 'subtopic', 'difficulty', 'question_no', 'question', 'created_by', 'created_at']
-    list_filter = ['topic', 'difficulty', 'created_by', 'created_at']
+    # An empty content hash marks a duplicate kept by the hash migrations for manual review
+    list_filter = ['topic', 'difficulty', 'created_by', 'created_at', ('content_hash', admin.EmptyFieldListFilter)]
     search_fields = ['question', 'topic', 'subtopic']
     ordering = ['-created_at']
 
 @admin.register(PDFUpload)
 class PDFUploadAdmin(admin.ModelAdmin):
     list_display = ['topic', 'subtopic', 'difficulty', 'question_no', 'question', 'uploaded_at']
-    list_filter = ['topic', 'difficulty', 'uploaded_at']
+    list_filter = ['topic', 'difficulty', 'uploaded_at', ('content_hash', admin.EmptyFieldListFilter)]
     change_list_template = 'pdf_upload_changelist.html'
     
     def get_urls(self):
@@ -55,6 +56,13 @@ class QuizAttemptAdmin(admin.ModelAdmin):
     list_display = ['user', 'topic', 'score', 'attempt_date']
     list_filter = ['topic', 'attempt_date']
 
+@admin.register(IngestionJob)
+class IngestionJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'attempts', 'progress_current', 'progress_total', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+    readonly_fields = ['params', 'result', 'error', 'started_at', 'finished_at', 'attempts', 'heartbeat_at']
+    ordering = ['-created_at']
+
 admin.site.register(Profile)
 admin.site.register(UserPreferences)
 admin.site.register(Achievement)
\ No newline at end of file
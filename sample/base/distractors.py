@@ -0,0 +1,165 @@
+"""Embedding-based distractor selection for generated MCQs.
+
+Each topic gets a vocabulary of domain terms (the short options already in its
+question bank) embedded once into a row-normalized float32 matrix and
+saved under settings.DISTRACTOR_CACHE_DIR; later builds only embed the terms
+that are new. Picking distractors for an answer is then a single matrix-vector
+product: the nearest terms that are not the answer itself or a paraphrase of it.
+"""
+import hashlib
+import os
+import random
+import threading
+import numpy as np
+from django.conf import settings
+from . import nlp_server
+from .question_bank import get_bank_version
+
+MAX_TERM_WORDS = 5
+MAX_TERM_CHARS = 60
+DEFAULT_VOCAB_SIZE = 5000
+# Candidates above this similarity are treated as the answer reworded, not a distractor
+MAX_SIMILARITY = 0.92
+PLACEHOLDERS = ["None of the above", "All of the above", "Cannot be determined"]
+
+_engines = {}
+_lock = threading.Lock()
+
+def get_cache_dir():
+    return getattr(settings, 'DISTRACTOR_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'distractors'))
+
+def normalize_term(term):
+    return ' '.join(term.lower().split())
+
+def _normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim != 2:
+        return np.zeros((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+def embed_terms(terms):
+    """Row-normalized embedding matrix for terms, from one model call"""
+    if not terms:
+        return np.zeros((0, 0), dtype=np.float32)
+    return _normalize_rows(nlp_server.embeddings(list(terms)))
+
+class DistractorEngine:
+    """Nearest-neighbour distractor picker over a fixed, normalized term matrix"""
+
+    def __init__(self, terms, vectors):
+        self.terms = list(terms)
+        self.vectors = vectors
+        self.positions = {normalize_term(term): i for i, term in enumerate(self.terms)}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def extend(self, terms):
+        """Engine with extra terms (e.g. keywords of the document being processed) appended"""
+        new_terms = [term for term in dict.fromkeys(terms) if normalize_term(term) not in self.positions]
+        if not new_terms:
+            return self
+        new_vectors = embed_terms(new_terms)
+        vectors = new_vectors if not len(self.terms) else np.vstack([self.vectors, new_vectors])
+        return DistractorEngine(self.terms + new_terms, vectors)
+
+    def pick(self, answer, k=3, exclude=()):
+        """Up to k terms closest to the answer, skipping the answer, its paraphrases and anything in exclude"""
+        answer_key = normalize_term(answer)
+        answer_words = set(answer_key.split())
+        position = self.positions.get(answer_key)
+        if position is None or not len(self.terms):
+            return []
+
+        scores = self.vectors @ self.vectors[position]
+        skip = {answer_key} | {normalize_term(term) for term in exclude}
+        picked = []
+        for i in np.argsort(-scores):
+            term = self.terms[i]
+            key = normalize_term(term)
+            words = set(key.split())
+            # 'python lists' can't be a distractor for 'lists', but 'mutable' can for 'immutable'
+            if scores[i] >= MAX_SIMILARITY or key in skip or words <= answer_words or answer_words <= words:
+                continue
+            picked.append(term)
+            skip.add(key)
+            if len(picked) == k:
+                break
+        return picked
+
+def topic_terms(topic, limit=None):
+    """Short, distinct answer options from the topic's question bank, most frequent first"""
+    from django.db.models import Count
+    from .models import QuestionBankEntry
+
+    limit = limit or getattr(settings, 'DISTRACTOR_VOCAB_SIZE', DEFAULT_VOCAB_SIZE)
+    counts = {}
+    entries = QuestionBankEntry.objects.filter(topic=topic)
+    for field in ('option1', 'option2', 'option3', 'option4'):
+        for value, count in entries.values_list(field).annotate(n=Count('id')):
+            term = ' '.join(value.split())
+            if term and len(term) <= MAX_TERM_CHARS and len(term.split()) <= MAX_TERM_WORDS:
+                counts[term] = counts.get(term, 0) + count
+    return sorted(counts, key=lambda term: (-counts[term], term))[:limit]
+
+def _topic_path(topic):
+    return os.path.join(get_cache_dir(), f"topic-{hashlib.sha1(topic.encode('utf-8')).hexdigest()[:16]}.npz")
+
+def build_topic_engine(topic):
+    """Build a topic's engine, reusing embeddings saved by earlier builds and saving the result"""
+    terms = topic_terms(topic)
+    path = _topic_path(topic)
+    stored = {}
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            stored = dict(zip(data['terms'].tolist(), data['vectors']))
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+
+    missing = [term for term in terms if term not in stored]
+    if missing:
+        stored.update(zip(missing, embed_terms(missing)))
+    if not terms:
+        return DistractorEngine([], np.zeros((0, 0), dtype=np.float32))
+    vectors = np.vstack([stored[term] for term in terms]).astype(np.float32)
+
+    if missing:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, terms=np.array(terms), vectors=vectors)
+        os.replace(tmp_path, path)
+        print(f"DEBUG: Distractor vocabulary for '{topic}': {len(terms)} terms, {len(missing)} newly embedded")
+    return DistractorEngine(terms, vectors)
+
+def get_topic_engine(topic):
+    """Topic engine for the current bank version, kept in memory until the bank changes"""
+    version = get_bank_version()
+    engine = _engines.get(topic)
+    if engine is not None and engine[0] == version:
+        return engine[1]
+    with _lock:
+        engine = _engines.get(topic)
+        if engine is None or engine[0] != version:
+            engine = (version, build_topic_engine(topic))
+            _engines[topic] = engine
+    return engine[1]
+
+def get_engine(terms, topic=None):
+    """Engine over the topic vocabulary (if any) plus terms, embedded in one batch"""
+    base = get_topic_engine(topic) if topic else DistractorEngine([], np.zeros((0, 0), dtype=np.float32))
+    return base.extend(terms)
+
+def pick_distractors(engine, answer, fallback_terms=(), k=3, rng=random):
+    """k distractors for answer: nearest neighbours first, then random fallback terms, then placeholders"""
+    distractors = engine.pick(answer, k)
+    if len(distractors) < k:
+        taken = {normalize_term(term) for term in distractors} | {normalize_term(answer)}
+        remaining = [term for term in fallback_terms if normalize_term(term) not in taken]
+        distractors += rng.sample(remaining, min(k - len(distractors), len(remaining)))
+    for placeholder in PLACEHOLDERS:
+        if len(distractors) >= k:
+            break
+        distractors.append(placeholder)
+    return distractors
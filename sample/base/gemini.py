@@ -0,0 +1,172 @@
+"""Process-wide Gemini client shared by every LLM call site.
+
+The API key is configured once per process (after a fork the client is
+rebuilt, since gRPC channels don't survive one) and every call goes through
+the same gRPC channel, so requests after the first skip connection setup and
+the TLS handshake. Each call site names an entry in settings.LLM_CALL_SITES,
+which picks a model tier from settings.LLM_MODEL_TIERS, a timeout in seconds
+and how many times transient API errors are retried.
+
+Async views use agenerate_text() and astream_text(), which run on a grpc.aio client. Such a
+client is bound to the event loop it was created on, so there is one per loop
+(one per ASGI worker in practice).
+
+settings.GEMINI_CLIENT_CLASSES can name replacement client classes ('sync' and
+'async'); only test settings such as benchmarks/stub_settings.py set it.
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+DEFAULT_MODEL_TIERS = {
+    'fast': 'gemini-2.5-flash',
+    'quality': 'gemini-2.5-pro',
+}
+DEFAULT_CALL_SITE = {'tier': 'quality', 'timeout': 60, 'retries': 2}
+MAX_BACKOFF = 8
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+def _api_key():
+    if not settings.GEMINI_API_KEY:
+        raise ImproperlyConfigured('Set GOOGLE_AI_API_KEY to use the Gemini features')
+    return settings.GEMINI_API_KEY
+
+def _client_class_override(kind):
+    """Client class named in settings.GEMINI_CLIENT_CLASSES for kind ('sync' or 'async'), if any"""
+    path = getattr(settings, 'GEMINI_CLIENT_CLASSES', {}).get(kind)
+    return import_string(path) if path else None
+
+def get_client():
+    """The shared generative service client, configured on first use in each process"""
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            override = _client_class_override('sync')
+            if override is not None:
+                _client = override()
+            else:
+                import google.generativeai as genai
+                from google.generativeai.client import get_default_generative_client
+                genai.configure(api_key=_api_key())
+                _client = get_default_generative_client()
+            _client_pid = os.getpid()
+    return _client
+
+def get_async_client():
+    """The grpc.aio generative service client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        override = _client_class_override('async')
+        if override is not None:
+            client = override()
+        else:
+            import google.ai.generativelanguage as glm
+            client = glm.GenerativeServiceAsyncClient(client_options={'api_key': _api_key()})
+        _async_clients[loop] = client
+    return client
+
+def call_site_config(site):
+    """Model name, timeout and retry count for a call site"""
+    config = dict(DEFAULT_CALL_SITE, **getattr(settings, 'LLM_CALL_SITES', {}).get(site, {}))
+    tiers = dict(DEFAULT_MODEL_TIERS, **getattr(settings, 'LLM_MODEL_TIERS', {}))
+    config['model'] = tiers[config['tier']]
+    return config
+
+def _transient_errors():
+    from google.api_core import exceptions
+    # Rate limits and server-side hiccups; bad requests and auth errors fail straight away
+    return (exceptions.ResourceExhausted, exceptions.ServiceUnavailable,
+            exceptions.InternalServerError, exceptions.DeadlineExceeded)
+
+def _with_retries(config, call):
+    """Run call() up to retries + 1 times, backing off 1s, 2s, 4s... between transient failures"""
+    transient = _transient_errors()
+    for attempt in range(config['retries'] + 1):
+        try:
+            return call()
+        except transient as e:
+            if attempt == config['retries']:
+                raise
+            delay = min(2 ** attempt, MAX_BACKOFF)
+            print(f"DEBUG: Gemini call failed ({type(e).__name__}), retrying in {delay}s")
+            time.sleep(delay)
+
+async def _awith_retries(config, call):
+    """_with_retries for coroutines; the backoff sleeps don't block the event loop"""
+    transient = _transient_errors()
+    for attempt in range(config['retries'] + 1):
+        try:
+            return await call()
+        except transient as e:
+            if attempt == config['retries']:
+                raise
+            delay = min(2 ** attempt, MAX_BACKOFF)
+            print(f"DEBUG: Gemini call failed ({type(e).__name__}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+def _build_request(model, prompt):
+    import google.ai.generativelanguage as glm
+    return glm.GenerateContentRequest(
+        model=model if '/' in model else f'models/{model}',
+        contents=[glm.Content(role='user', parts=[glm.Part(text=prompt)])],
+    )
+
+def _response_text(response):
+    if not response.candidates:
+        raise ValueError(f'Gemini returned no candidates: {response.prompt_feedback}')
+    return ''.join(part.text for part in response.candidates[0].content.parts)
+
+def generate_text(site, prompt):
+    """Run a prompt for a call site and return the response text"""
+    config = call_site_config(site)
+    request = _build_request(config['model'], prompt)
+    # The client's own retry would keep going until a deadline; attempts are counted here instead
+    response = _with_retries(config, lambda: get_client().generate_content(request, retry=None, timeout=config['timeout']))
+    return _response_text(response)
+
+async def agenerate_text(site, prompt):
+    """generate_text for async views: waits on the API without holding a thread"""
+    config = call_site_config(site)
+    request = _build_request(config['model'], prompt)
+    response = await _awith_retries(config, lambda: get_async_client().generate_content(request, retry=None, timeout=config['timeout']))
+    return _response_text(response)
+
+async def astream_text(site, prompt):
+    """Yield the response text for a call site chunk by chunk as Gemini generates it.
+
+    Transient errors are retried only until the first chunk arrives; after
+    that the caller has already forwarded text, so the error is raised.
+    """
+    config = call_site_config(site)
+    request = _build_request(config['model'], prompt)
+    transient = _transient_errors()
+    for attempt in range(config['retries'] + 1):
+        started = False
+        try:
+            stream = await get_async_client().stream_generate_content(request, retry=None, timeout=config['timeout'])
+            async for chunk in stream:
+                # The last chunk can carry only usage metadata
+                if chunk.candidates:
+                    text = ''.join(part.text for part in chunk.candidates[0].content.parts)
+                    if text:
+                        started = True
+                        yield text
+            return
+        except transient as e:
+            if started or attempt == config['retries']:
+                raise
+            delay = min(2 ** attempt, MAX_BACKOFF)
+            print(f"DEBUG: Gemini stream failed ({type(e).__name__}), retrying in {delay}s")
+            await asyncio.sleep(delay)
@@ -0,0 +1,236 @@
+"""Background ingestion jobs: PDF extraction and AI question generation.
+
+Views queue an IngestionJob and return its id straight away; the worker
+started with `manage.py run_ingestion_worker` claims queued jobs, runs the
+handler for the job's kind and records progress and a result summary that
+clients poll through the ingestion job status endpoint.
+
+While a job runs the worker touches its heartbeat. If the worker dies (OOM,
+restart, SIGKILL) the heartbeat goes stale and recover_stale_jobs() puts the
+job back in the queue, or fails it after settings.INGESTION_JOB_MAX_ATTEMPTS.
+Handler exceptions fail the job straight away.
+"""
+import os
+import threading
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import AIGeneratedPDF, IngestionJob, TopicRequest
+from .question_writer import save_mcqs, save_mcq_stream
+
+def enqueue_job(kind, user, params, source_file=None):
+    """Queue a job; an uploaded PDF is copied to media storage for the worker"""
+    job = IngestionJob(kind=kind, params=params, created_by=user)
+    if source_file is not None:
+        job.source_file.save(os.path.basename(source_file.name), source_file, save=False)
+    job.save()
+    return job
+
+DEFAULT_STALE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+def claim_next_job():
+    """Mark the oldest queued job as running and return it, or None when the queue is empty"""
+    with transaction.atomic():
+        # skip_locked lets several workers poll the same table without claiming a job twice
+        job = IngestionJob.objects.select_for_update(skip_locked=True).filter(status='queued').order_by('created_at').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'attempts'])
+    return job
+
+def _release_source_file(job):
+    # The upload is only needed while the job can still run
+    if job.source_file:
+        job.source_file.delete(save=False)
+        job.source_file = ''
+        job.save(update_fields=['source_file'])
+
+def recover_stale_jobs():
+    """Re-queue running jobs whose worker stopped sending heartbeats, failing those out of attempts.
+
+    Returns (requeued, failed) counts.
+    """
+    stale_seconds = getattr(settings, 'INGESTION_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+    max_attempts = getattr(settings, 'INGESTION_JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_seconds)
+    # Jobs started before heartbeats existed only have started_at
+    stale = IngestionJob.objects.filter(status='running').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+
+    failed = 0
+    for job in stale.filter(attempts__gte=max_attempts):
+        # Filtering on status again means a job that just finished is left alone
+        if IngestionJob.objects.filter(pk=job.pk, status='running').update(
+            status='failed', error=f'Worker stopped while running the job ({job.attempts} attempts)', finished_at=now,
+        ):
+            failed += 1
+            _release_source_file(job)
+    requeued = stale.filter(attempts__lt=max_attempts).update(status='queued', started_at=None, heartbeat_at=None)
+    if requeued or failed:
+        print(f"DEBUG: Recovered abandoned ingestion jobs: {requeued} re-queued, {failed} failed")
+    return requeued, failed
+
+def _heartbeat(job_id, stop, interval):
+    try:
+        while not stop.wait(interval):
+            IngestionJob.objects.filter(pk=job_id, status='running').update(heartbeat_at=timezone.now())
+    finally:
+        connection.close()
+
+def run_job(job):
+    """Run a claimed job and store its result or error"""
+    stop = threading.Event()
+    interval = getattr(settings, 'INGESTION_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS) / 5
+    heartbeat = threading.Thread(target=_heartbeat, args=(job.id, stop, interval), daemon=True)
+    heartbeat.start()
+    try:
+        job.result = JOB_HANDLERS[job.kind](job)
+        job.status = 'completed'
+    except Exception as e:
+        print(f"ERROR in ingestion job {job.id}: {e}")
+        traceback.print_exc()
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        stop.set()
+        heartbeat.join()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    _release_source_file(job)
+    return job
+
+def _cache_label(cache_info):
+    hit = cache_info.get('hit')
+    return f"PDF cache: hit ({'parsed MCQs' if hit == 'mcqs' else 'extracted text'})" if hit else "PDF cache: miss"
+
+def _run_pdf_upload(job):
+    from .mcq_parser import MCQParser
+    from .utils import iter_mcqs_from_pdf
+
+    params = job.params
+    parser = MCQParser()
+    cache_info = {}
+
+    def progress(totals):
+        job.report_progress(totals['received'], message=f"Parsed {totals['received']} MCQs, saved {totals['saved']}")
+
+    job.report_progress(0, message='Extracting MCQs from PDF')
+    with job.source_file.open('rb') as pdf_file:
+        stats = save_mcq_stream(
+            iter_mcqs_from_pdf(pdf_file, parser, cache_info), params['topic'], params['subtopic'], params['difficulty'],
+            job.created_by, params.get('near_duplicates', 'flag'), progress=progress,
+        )
+
+    policy = params.get('near_duplicates', 'flag')
+    message = (f"Extracted: {stats['received']} | {_cache_label(cache_info)} | Unparsed lines: {parser.error_count} | Invalid: {stats['invalid']} | "
+               f"Duplicates: {stats['duplicates']} | Already in DB: {stats['existing']} | "
+               f"Near-duplicates ({policy}): {stats['near_duplicates']} | New saved: {stats['saved']}")
+    return {
+        'message': message,
+        **stats,
+        'cache': cache_info,
+        'unparsed_lines': [{'line': line_no, 'text': text, 'reason': reason} for line_no, text, reason in parser.errors[:50]],
+    }
+
+def _run_pdf_ai(job):
+    from .ml_utils import generate_mcqs
+    from .utils import AI_SOURCE_TEXT_LIMIT, read_pdf_text
+
+    params = job.params
+    cache_info = {}
+    job.report_progress(0, 3, 'Reading PDF text')
+    with job.source_file.open('rb') as pdf_file:
+        # Only the leading text is needed to generate a handful of questions
+        text = read_pdf_text(pdf_file, max_chars=AI_SOURCE_TEXT_LIMIT, cache_info=cache_info)
+    if not text.strip():
+        raise ValueError('No text found in PDF')
+
+    num_questions = params.get('num_questions', 10)
+    job.report_progress(1, message=f'Generating {num_questions} MCQs')
+    # Seeding with the job id makes a job re-queued after a worker crash produce the same questions
+    mcqs = generate_mcqs(text, num_questions, topic=params['topic'], seed=job.id)
+
+    job.report_progress(2, message='Saving MCQs')
+    policy = params.get('near_duplicates', 'flag')
+    stats = save_mcqs(mcqs, params['topic'], params['subtopic'], params['difficulty'], job.created_by, policy)
+    job.report_progress(3, message='Done')
+    return {
+        'message': (f"Successfully generated {len(mcqs)} AI MCQs and saved {stats['saved']} | {_cache_label(cache_info)} | "
+                    f"Near-duplicates ({policy}): {stats['near_duplicates']}"),
+        **stats,
+        'cache': cache_info,
+    }
+
+def _generate_questions_with_pdf(job, topic, subtopic, difficulty, num_questions):
+    """Generate questions with Gemini, render them to a PDF and record it; returns (questions, AIGeneratedPDF)"""
+    from .ai_quiz_generator import AIQuizGenerator
+
+    job.report_progress(0, 3, f'Generating {num_questions} questions')
+    generator = AIQuizGenerator()
+    questions = generator.generate_quiz_content(topic, subtopic, difficulty, num_questions)
+    if not questions:
+        raise ValueError('Failed to generate questions - AI returned empty response')
+    print(f"DEBUG: Generated {len(questions)} questions")
+
+    job.report_progress(1, message='Creating PDF')
+    filename = f"{topic}_{subtopic}_{difficulty}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    pdf_path = os.path.join(settings.MEDIA_ROOT, 'ai_generated_pdfs', filename)
+    os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+    generator.create_pdf(questions, topic, subtopic, difficulty, pdf_path)
+
+    ai_pdf = AIGeneratedPDF.objects.create(
+        topic=topic,
+        subtopic=subtopic,
+        difficulty=difficulty,
+        num_questions=num_questions,
+        pdf_file=f'ai_generated_pdfs/{filename}',
+        created_by=job.created_by
+    )
+    job.report_progress(2, message='Saving questions')
+    return questions, ai_pdf
+
+def _run_ai_quiz(job):
+    params = job.params
+    policy = params.get('near_duplicates', 'flag')
+    questions, ai_pdf = _generate_questions_with_pdf(
+        job, params['topic'], params['subtopic'], params['difficulty'], params['num_questions']
+    )
+    stats = save_mcqs(questions, params['topic'], params['subtopic'], params['difficulty'], job.created_by, policy)
+    job.report_progress(3, message='Done')
+    return {
+        'message': f"Generated {len(questions)} questions and saved PDF | Near-duplicates ({policy}): {stats['near_duplicates']}",
+        'pdf_id': ai_pdf.id,
+        **stats,
+    }
+
+def _run_topic_request(job):
+    topic_request = TopicRequest.objects.get(id=job.params['topic_request_id'])
+    subtopic = topic_request.subtopic or 'General'
+    questions, ai_pdf = _generate_questions_with_pdf(job, topic_request.topic, subtopic, topic_request.difficulty, 50)
+    stats = save_mcqs(questions, topic_request.topic, subtopic, topic_request.difficulty, job.created_by)
+
+    topic_request.status = 'completed'
+    topic_request.admin_notes = f'Auto-generated {len(questions)} questions using AI'
+    topic_request.save(update_fields=['status', 'admin_notes', 'updated_at'])
+    job.report_progress(3, message='Done')
+    return {
+        'message': f'Generated {len(questions)} questions and PDF for {topic_request.topic}',
+        'pdf_id': ai_pdf.id,
+        **stats,
+    }
+
+JOB_HANDLERS = {
+    'pdf_upload': _run_pdf_upload,
+    'pdf_ai': _run_pdf_ai,
+    'ai_quiz': _run_ai_quiz,
+    'topic_request': _run_topic_request,
+}
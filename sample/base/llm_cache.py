@@ -0,0 +1,139 @@
+"""Response cache for LLM calls whose answer depends only on a short user input.
+
+Responses live in the 'llm' cache alias (file-based, so every worker on the host
+shares them), keyed by call site and the input folded to lowercase words.
+Entries expire after settings.LLM_CACHE_TTL seconds and the backend culls the
+oldest files past MAX_ENTRIES. Hit and miss counts per call site are
+SharedCounter rows, incremented atomically in the database so concurrent
+workers never lose a count.
+
+With semantic=True an exact miss is looked up in semantic_cache, which
+matches paraphrases of earlier inputs by embedding similarity.
+"""
+import hashlib
+import re
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from . import semantic_cache
+from .models import SharedCounter
+
+CACHE_ALIAS = 'llm'
+OUTCOMES = ('hits', 'semantic_hits', 'misses')
+DEFAULT_TTL = 7 * 24 * 3600
+# Bump when a call site's prompt changes so old responses stop being served
+PROMPT_VERSION = 1
+# '+' and '#' are kept so "C++" and "C#" don't both fold to "c"
+PUNCTUATION_RE = re.compile(r'[^\w\s+#]')
+
+def normalize_input(text):
+    """Fold case, punctuation and whitespace: ' Python  Decorators? ' -> 'python decorators'"""
+    return ' '.join(PUNCTUATION_RE.sub(' ', text.casefold()).split())
+
+def _cache_key(site, normalized):
+    return f"{site}:v{PROMPT_VERSION}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+def _counter_name(site, outcome):
+    return f"llm_cache:{site}:{outcome}"
+
+# Counter outcome per lookup source
+SOURCE_OUTCOMES = {'exact': 'hits', 'semantic': 'semantic_hits', None: 'misses'}
+
+def _count(site, source):
+    SharedCounter.increment(_counter_name(site, SOURCE_OUTCOMES[source]))
+
+def _search(site, normalized, semantic):
+    """(response, source, vector) from the exact then the semantic cache; response is None on a miss.
+
+    Only cache files and the embedding model are touched, never the database,
+    so async callers can run it outside Django's request thread.
+    """
+    cache = caches[CACHE_ALIAS]
+    key = _cache_key(site, normalized)
+    response = cache.get(key)
+    if response is not None:
+        return response, 'exact', None
+
+    vector = semantic_cache.embed(normalized) if semantic else None
+    if vector is not None:
+        response = semantic_cache.lookup(site, vector)
+        if response is not None:
+            # Later repeats of this exact wording are then served to every worker without embedding
+            cache.set(key, response, getattr(settings, 'LLM_CACHE_TTL', DEFAULT_TTL))
+            return response, 'semantic', vector
+    return None, None, vector
+
+def _lookup(site, normalized, semantic):
+    response, source, vector = _search(site, normalized, semantic)
+    _count(site, source)
+    return response, source, vector
+
+def _store(site, normalized, vector, response, llm_seconds):
+    caches[CACHE_ALIAS].set(_cache_key(site, normalized), response, getattr(settings, 'LLM_CACHE_TTL', DEFAULT_TTL))
+    if vector is not None:
+        semantic_cache.add(site, normalized, vector, response, llm_seconds)
+
+def get_or_generate(site, text, generate, semantic=False):
+    """Cached response for (site, text), calling generate() on a miss.
+
+    Returns (response, source) where source is 'exact', 'semantic' or None for a generated response.
+    """
+    normalized = normalize_input(text)
+    if not normalized:
+        return generate(), None
+
+    response, source, vector = _lookup(site, normalized, semantic)
+    if response is not None:
+        return response, source
+
+    start = time.perf_counter()
+    response = generate()
+    _store(site, normalized, vector, response, time.perf_counter() - start)
+    return response, None
+
+async def alookup(site, text, semantic=False):
+    """Cache lookup for async callers that produce the response themselves (e.g. by streaming).
+
+    Returns (response, source, vector); on a miss response is None and vector
+    (if any) should be handed back to astore() with the finished response.
+    """
+    normalized = normalize_input(text)
+    if not normalized:
+        return None, None, None
+    response, source, vector = await sync_to_async(_search, thread_sensitive=False)(site, normalized, semantic)
+    # The counter is an ORM write, so it runs on Django's thread, whose connection is closed at the end of the request
+    await sync_to_async(_count)(site, source)
+    return response, source, vector
+
+async def astore(site, text, vector, response, llm_seconds):
+    """Cache a response produced after an alookup() miss"""
+    normalized = normalize_input(text)
+    if normalized:
+        await sync_to_async(_store, thread_sensitive=False)(site, normalized, vector, response, llm_seconds)
+
+async def aget_or_generate(site, text, agenerate, semantic=False):
+    """get_or_generate for async views: agenerate is a coroutine function, cache file I/O and embedding run in threads"""
+    response, source, vector = await alookup(site, text, semantic)
+    if response is not None:
+        return response, source
+
+    start = time.perf_counter()
+    response = await agenerate()
+    await astore(site, text, vector, response, time.perf_counter() - start)
+    return response, None
+
+def cache_stats(sites=None):
+    """Exact hits, semantic hits, misses and overall hit rate per call site, across all workers"""
+    sites = list(sites or getattr(settings, 'LLM_CALL_SITES', {}))
+    counts = dict(SharedCounter.objects.filter(
+        name__in=[_counter_name(site, outcome) for site in sites for outcome in OUTCOMES]
+    ).values_list('name', 'value'))
+    result = {}
+    for site in sites:
+        hits, semantic_hits, misses = (counts.get(_counter_name(site, outcome), 0) for outcome in OUTCOMES)
+        total = hits + semantic_hits + misses
+        if total:
+            result[site] = {'hits': hits, 'semantic_hits': semantic_hits, 'misses': misses,
+                            'hit_rate': round((hits + semantic_hits) / total, 3)}
+    return result
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from base.models import QuestionBankEntry
+from base.near_duplicates import cluster_near_duplicates, get_threshold, index_entries
+
+
+class Command(BaseCommand):
+    help = "Index MinHash signatures for the question bank and report near-duplicate clusters"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=None,
+                            help='Minimum estimated Jaccard similarity (default: NEAR_DUPLICATE_THRESHOLD or 0.8)')
+        parser.add_argument('--reindex', action='store_true',
+                            help='Recompute signatures for every question, not only ones missing them')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        threshold = options['threshold'] if options['threshold'] is not None else get_threshold()
+        entries = QuestionBankEntry.objects.order_by('pk')
+        if not options['reindex']:
+            entries = entries.filter(minhash__isnull=True)
+
+        indexed = 0
+        batch = []
+        for entry in entries.iterator(chunk_size=options['batch_size']):
+            batch.append(entry)
+            if len(batch) >= options['batch_size']:
+                index_entries(batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            index_entries(batch)
+            indexed += len(batch)
+        self.stdout.write(f"Indexed {indexed} questions")
+
+        clusters = cluster_near_duplicates(threshold)
+        questions = QuestionBankEntry.objects.in_bulk([entry_id for cluster in clusters for entry_id in cluster])
+        for number, cluster in enumerate(clusters, 1):
+            self.stdout.write(f"Cluster {number} ({len(cluster)} questions)")
+            for entry_id in cluster:
+                entry = questions[entry_id]
+                self.stdout.write(f"  {entry.key}: {entry.question[:80]}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(clusters)} near-duplicate clusters covering {sum(map(len, clusters))} questions (threshold {threshold})"
+        ))
@@ -0,0 +1,42 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from base.ingestion import claim_next_job, recover_stale_jobs, run_job
+from base.nlp_models import warm_up
+
+
+class Command(BaseCommand):
+    help = "Run queued ingestion jobs (PDF extraction and AI generation) until stopped"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--warm-up', action='store_true', help='Load the spaCy and KeyBERT models before taking jobs')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Ingestion worker started")
+        if options['warm_up']:
+            try:
+                for name, metrics in warm_up().items():
+                    self.stdout.write(f"Loaded {name} in {metrics['load_seconds']}s")
+            except Exception as e:
+                # Jobs that don't need the models can still run
+                self.stdout.write(self.style.WARNING(f"NLP model warm-up failed: {e}"))
+        try:
+            while True:
+                close_old_connections()
+                # Also picks up jobs left running by this worker's previous run once their heartbeat is stale
+                recover_stale_jobs()
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                self.stdout.write(f"Running job #{job.id} ({job.kind})")
+                run_job(job)
+                style = self.style.SUCCESS if job.status == 'completed' else self.style.ERROR
+                self.stdout.write(style(f"Job #{job.id} {job.status}"))
+        except KeyboardInterrupt:
+            self.stdout.write("Ingestion worker stopped")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from base.nlp_models import warm_up
+from base.nlp_server import DEFAULT_BATCH_SIZE, DEFAULT_BATCH_WAIT, get_socket_path, serve
+
+
+class Command(BaseCommand):
+    help = "Serve keyword extraction and sentence segmentation to web workers over a Unix socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=None, help='Socket path (default: settings.NLP_SERVER_SOCKET)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--batch-wait', type=float, default=DEFAULT_BATCH_WAIT,
+                            help='Seconds to wait for more requests before running a batch')
+        parser.add_argument('--no-warm-up', action='store_true', help='Load models on the first request instead of at startup')
+
+    def handle(self, *args, **options):
+        path = options['socket'] or get_socket_path()
+        if not options['no_warm_up']:
+            for name, metrics in warm_up().items():
+                self.stdout.write(f"Loaded {name} in {metrics['load_seconds']}s")
+        self.stdout.write(f"NLP server listening on {path}")
+        try:
+            serve(path, options['batch_size'], options['batch_wait'])
+        except KeyboardInterrupt:
+            self.stdout.write("NLP server stopped")
@@ -1,9 +1,11 @@
 import random
+from .distractors import get_engine, pick_distractors
 from .nlp_utils import extract_keywords, clean_sentences
 
-def generate_mcqs(text, num_questions=5):
+def generate_mcqs(text, num_questions=5, topic=None):
     sentences = clean_sentences(text)
     keywords = extract_keywords(text, top_n=num_questions)
+    engine = get_engine(keywords, topic)
 
     questions = []
     for i, keyword in enumerate(keywords):
@@ -11,11 +13,8 @@ def generate_mcqs(text, num_questions=5):
             break
         q_text = sentences[i].replace(keyword, "_____")
         
-        # fake options (later improve using WordNet / transformers)
-        distractors = random.sample(keywords, min(3, len(keywords)))
-        if keyword in distractors:
-            distractors.remove(keyword)
-        options = distractors[:3] + [keyword]
+        distractors = pick_distractors(engine, keyword, keywords)
+        options = distractors + [keyword]
         random.shuffle(options)
 
         questions.append({
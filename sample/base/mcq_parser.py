@@ -0,0 +1,124 @@
+"""Single-pass, line-oriented MCQ parser for text extracted from question PDFs.
+
+Recognizes numbered questions ("12. ..."), options in any of the A) / (A) / a)
+styles and an "Answer: X" line, in one scan with precompiled patterns. Text can
+be fed incrementally (one PDF page at a time); only the MCQ being read and the
+unfinished last line are kept between calls.
+"""
+import re
+
+# One alternation classifies every line: an answer, an option in any style, or a numbered question
+LINE_RE = re.compile(
+    r'[ \t]*(?:'
+    r'(?i:answer)[ \t]*:[ \t]*(?P<answer>[A-Da-d])\b'
+    r'|(?:\((?P<paren>[A-Da-d])\)|(?P<letter>[A-Da-d])\))[ \t]*(?P<option>.*)'
+    r'|(?P<number>\d+)\.(?!\d)[ \t]*(?P<question>.*)'
+    r')'
+)
+
+OPTION_LETTERS = 'ABCD'
+# Part of the PDF cache key for parsed MCQs: bump it whenever a change alters the parser's output
+PARSER_VERSION = 1
+MAX_MCQ_CHARS = 20000  # an MCQ still open after this much text is dropped as unparsable
+MAX_REPORTED_ERRORS = 1000
+
+class MCQParser:
+    """Incremental MCQ parser: feed() text, get completed MCQs back, check errors afterwards"""
+
+    def __init__(self):
+        self.line_no = 0
+        self.errors = []       # (line number, line, reason), capped at MAX_REPORTED_ERRORS
+        self.error_count = 0
+        self._partial = ''
+        self._reset()
+
+    def _reset(self):
+        self._question = None  # list of question text lines while an MCQ is open
+        self._options = []     # list of option text lines per option seen so far
+        self._start_line = 0
+        self._size = 0
+
+    def _error(self, line_no, line, reason):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, line[:200], reason))
+
+    def _abandon(self, reason):
+        if self._question is not None:
+            self._error(self._start_line, ' '.join(self._question), reason)
+        self._reset()
+
+    def feed(self, text):
+        """Parse more text and return the MCQs completed by it"""
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        mcqs = []
+        for line in lines:
+            mcq = self._parse_line(line)
+            if mcq:
+                mcqs.append(mcq)
+        return mcqs
+
+    def close(self):
+        """Flush the last line and report an MCQ left without an answer"""
+        mcqs = self.feed('\n') if self._partial else []
+        self._abandon('incomplete question at end of text')
+        return mcqs
+
+    def _parse_line(self, line):
+        self.line_no += 1
+        match = LINE_RE.match(line)
+        kind = match.lastgroup if match else None
+        if kind == 'option' or kind == 'question':
+            # lastgroup is the trailing text group; tell options apart by their letter
+            kind = 'option' if match.group('paren') or match.group('letter') else 'question'
+
+        if kind == 'answer' and self._question is not None:
+            if len(self._options) < 4:
+                self._abandon('answer before four options')
+                return None
+            mcq = {
+                'question': ' '.join(self._question).strip(),
+                'option_a': ' '.join(self._options[0]).strip(),
+                'option_b': ' '.join(self._options[1]).strip(),
+                'option_c': ' '.join(self._options[2]).strip(),
+                'option_d': ' '.join(self._options[3]).strip(),
+                'correct_answer': match.group('answer').upper(),
+            }
+            self._reset()
+            return mcq
+
+        # Options must come in A-D order; anything else is continuation text
+        if (kind == 'option' and self._question is not None and len(self._options) < 4
+                and (match.group('paren') or match.group('letter')).upper() == OPTION_LETTERS[len(self._options)]):
+            self._options.append([match.group('option')])
+            self._size += len(line)
+            return None
+
+        if kind == 'question':
+            self._abandon('question without four options and an answer')
+            self._question = [match.group('question')]
+            self._start_line = self.line_no
+            self._size = len(line)
+            return None
+
+        stripped = line.strip()
+        if not stripped:
+            return None
+        if self._question is None:
+            self._error(self.line_no, stripped, 'text outside a question')
+            return None
+
+        # Continuation of the question or of the last option
+        (self._options[-1] if self._options else self._question).append(stripped)
+        self._size += len(line)
+        if self._size > MAX_MCQ_CHARS:
+            self._abandon('question too long')
+        return None
+
+def parse_mcqs(text):
+    """Parse a whole text; returns (mcqs, parser) so callers can inspect parser.errors"""
+    parser = MCQParser()
+    mcqs = parser.feed(text)
+    mcqs.extend(parser.close())
+    return mcqs, parser
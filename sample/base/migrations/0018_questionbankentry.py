@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:46
+
+from itertools import chain
+
+from django.db import migrations, models
+
+
+def backfill_question_bank(apps, schema_editor):
+    PDFUpload = apps.get_model('base', 'PDFUpload')
+    GeneratedMCQ = apps.get_model('base', 'GeneratedMCQ')
+    QuestionBankEntry = apps.get_model('base', 'QuestionBankEntry')
+
+    def entries(queryset, source, date_field):
+        for q in queryset.iterator(chunk_size=2000):
+            yield QuestionBankEntry(
+                source=source, source_id=q.pk, topic=q.topic, subtopic=q.subtopic,
+                difficulty=q.difficulty, question_no=q.question_no, question=q.question,
+                option1=q.option1, option2=q.option2, option3=q.option3, option4=q.option4,
+                correct_answer=q.correct_answer, created_at=getattr(q, date_field),
+            )
+
+    batch = []
+    for entry in chain(entries(PDFUpload.objects.all(), 'pdf', 'uploaded_at'),
+                       entries(GeneratedMCQ.objects.all(), 'gen', 'created_at')):
+        batch.append(entry)
+        if len(batch) >= 2000:
+            QuestionBankEntry.objects.bulk_create(batch)
+            batch = []
+    QuestionBankEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0017_topicrequest_learningpathprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionBankEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('pdf', 'PDF Upload'), ('gen', 'AI Generated')], max_length=3)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('topic', models.CharField(max_length=50)),
+                ('subtopic', models.CharField(max_length=100)),
+                ('difficulty', models.CharField(max_length=10)),
+                ('question_no', models.PositiveIntegerField()),
+                ('question', models.TextField()),
+                ('option1', models.CharField(max_length=255)),
+                ('option2', models.CharField(max_length=255)),
+                ('option3', models.CharField(max_length=255)),
+                ('option4', models.CharField(max_length=255)),
+                ('correct_answer', models.CharField(max_length=1)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['topic', 'subtopic', 'difficulty'], name='bank_topic_sub_diff_idx')],
+                'unique_together': {('source', 'source_id')},
+            },
+        ),
+        migrations.RunPython(backfill_question_bank, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:20
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def compute_content_hash(question, options, correct_answer):
+    # Frozen copy of base.models.compute_content_hash
+    normalized = [' '.join(str(text).lower().split()) for text in (question, *options)]
+    return hashlib.sha256('\x00'.join([*normalized, str(correct_answer).strip().upper()]).encode()).hexdigest()
+
+
+def populate_content_hashes(apps, schema_editor):
+    for model_name in ('PDFUpload', 'GeneratedMCQ'):
+        model = apps.get_model('base', model_name)
+        seen = set()
+        batch = []
+        fields = ('pk', 'question', 'option1', 'option2', 'option3', 'option4', 'correct_answer')
+        for row in model.objects.order_by('pk').only(*fields).iterator(chunk_size=2000):
+            content_hash = compute_content_hash(row.question, (row.option1, row.option2, row.option3, row.option4), row.correct_answer)
+            # Existing duplicates keep a NULL hash so the unique index can be built; they are left for an admin to resolve
+            if content_hash in seen:
+                continue
+            seen.add(content_hash)
+            row.content_hash = content_hash
+            batch.append(row)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['content_hash'])
+                batch = []
+        model.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0018_questionbankentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedmcq',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='pdfupload',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(populate_content_hashes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='generatedmcq',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='pdfupload',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+import hashlib
+
+from django.db import migrations
+
+
+def compute_content_hash(question, options, correct_answer):
+    # Frozen copy of base.models.compute_content_hash
+    normalized = [' '.join(str(text).lower().split()) for text in (question, *options)]
+    return hashlib.sha256('\x00'.join([*normalized, str(correct_answer).strip().upper()]).encode()).hexdigest()
+
+
+def hash_unhashed_rows(apps, schema_editor):
+    """Give rows left with a NULL hash their hash where it is free; real duplicates keep NULL and are listed"""
+    for model_name in ('PDFUpload', 'GeneratedMCQ'):
+        model = apps.get_model('base', model_name)
+        duplicates = []
+        for row in model.objects.filter(content_hash__isnull=True).order_by('pk'):
+            content_hash = compute_content_hash(row.question, (row.option1, row.option2, row.option3, row.option4), row.correct_answer)
+            original = model.objects.filter(content_hash=content_hash).values_list('pk', flat=True).first()
+            if original is None:
+                model.objects.filter(pk=row.pk).update(content_hash=content_hash)
+            else:
+                duplicates.append((row.pk, original))
+        if duplicates:
+            # Nothing is deleted here; the admin's "content hash: empty" filter lists these rows for review
+            print(f"\n  {model_name}: {len(duplicates)} duplicate rows kept without a content hash "
+                  f"(id -> duplicate of): {', '.join(f'{pk}->{original}' for pk, original in duplicates[:50])}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0023_ingestion_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_unhashed_rows, migrations.RunPython.noop),
+    ]
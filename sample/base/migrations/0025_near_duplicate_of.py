@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0024_resolve_duplicate_questions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionbankentry',
+            name='near_duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='near_duplicates', to='base.questionbankentry'),
+        ),
+    ]
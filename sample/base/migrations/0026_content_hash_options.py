@@ -0,0 +1,47 @@
+import hashlib
+
+from django.db import migrations
+
+
+def compute_content_hash(question, options, correct_answer):
+    # Frozen copy of base.models.compute_content_hash
+    normalized = [' '.join(str(text).lower().split()) for text in (question, *options)]
+    return hashlib.sha256('\x00'.join([*normalized, str(correct_answer).strip().upper()]).encode()).hexdigest()
+
+
+def rehash_with_options(apps, schema_editor):
+    """Recompute every content hash now that it covers the options; rows that still collide keep NULL and are listed"""
+    fields = ('pk', 'question', 'option1', 'option2', 'option3', 'option4', 'correct_answer')
+    for model_name in ('PDFUpload', 'GeneratedMCQ'):
+        model = apps.get_model('base', model_name)
+        # Clear first so an old hash can never block a row's new one on the unique index
+        model.objects.update(content_hash=None)
+        seen = {}
+        duplicates = []
+        batch = []
+        for row in model.objects.order_by('pk').only(*fields).iterator(chunk_size=2000):
+            content_hash = compute_content_hash(row.question, (row.option1, row.option2, row.option3, row.option4), row.correct_answer)
+            if content_hash in seen:
+                duplicates.append((row.pk, seen[content_hash]))
+                continue
+            seen[content_hash] = row.pk
+            row.content_hash = content_hash
+            batch.append(row)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['content_hash'])
+                batch = []
+        model.objects.bulk_update(batch, ['content_hash'])
+        if duplicates:
+            print(f"\n  {model_name}: {len(duplicates)} duplicate rows kept without a content hash "
+                  f"(id -> duplicate of): {', '.join(f'{pk}->{original}' for pk, original in duplicates[:50])}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0025_near_duplicate_of'),
+    ]
+
+    operations = [
+        migrations.RunPython(rehash_with_options, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def backfill_minhash(apps, schema_editor):
+    """Compute MinHash signatures and LSH buckets for bank entries saved before 0020"""
+    # Signatures must match what near_duplicates computes at runtime, so its helpers are used rather than a frozen copy
+    from base.near_duplicates import band_buckets, minhash, pack_signature
+
+    QuestionBankEntry = apps.get_model('base', 'QuestionBankEntry')
+    QuestionLSHBucket = apps.get_model('base', 'QuestionLSHBucket')
+
+    def flush(entries, buckets):
+        QuestionBankEntry.objects.bulk_update(entries, ['minhash'], batch_size=1000)
+        QuestionLSHBucket.objects.filter(entry_id__in=[entry.pk for entry in entries]).delete()
+        QuestionLSHBucket.objects.bulk_create(buckets, batch_size=5000)
+
+    fields = ('pk', 'question', 'option1', 'option2', 'option3', 'option4')
+    entries, buckets = [], []
+    for entry in QuestionBankEntry.objects.filter(minhash__isnull=True).only(*fields).iterator(chunk_size=2000):
+        signature = minhash(entry.question, (entry.option1, entry.option2, entry.option3, entry.option4))
+        entry.minhash = pack_signature(signature)
+        entries.append(entry)
+        buckets.extend(QuestionLSHBucket(entry_id=entry.pk, bucket=bucket) for bucket in band_buckets(signature))
+        if len(entries) >= 2000:
+            flush(entries, buckets)
+            entries, buckets = [], []
+    flush(entries, buckets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0026_content_hash_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_minhash, migrations.RunPython.noop),
+    ]
@@ -1,41 +1,203 @@
 import random
-import spacy
-from keybert import KeyBERT
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from django.conf import settings
+from . import nlp_server
+from .distractors import get_engine, pick_distractors
 
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
-kw_model = KeyBERT()
+WORD_RE = re.compile(r'\w+')
 
-def generate_mcqs(text, num_questions=5):
-    """Generate MCQs from text using KeyBERT + spaCy"""
-    keywords = kw_model.extract_keywords(text, keyphrase_ngram_range=(1, 2), stop_words='english', top_n=20)
-    keywords = [kw[0] for kw in keywords]
+class SentenceIndex:
+    """Inverted index of lowercased word n-grams to sentences, built once per document.
 
-    doc = nlp(text)
-    sentences = [sent.text for sent in doc.sents if len(sent.text) > 20]
+    find() resolves a keyphrase with one dict lookup and prefers sentences
+    that no earlier question has used.
+    """
+
+    def __init__(self, sentences, max_n=2):
+        self.sentences = sentences
+        self.max_n = max_n
+        self.postings = defaultdict(list)
+        self.used = set()
+        self._cursors = {}
+        for position, sentence in enumerate(sentences):
+            tokens = WORD_RE.findall(sentence.lower())
+            grams = {' '.join(tokens[i:i + n]) for n in range(1, max_n + 1) for i in range(len(tokens) - n + 1)}
+            for gram in grams:
+                self.postings[gram].append(position)
+
+    def _long_phrase_postings(self, key, tokens):
+        # Phrases longer than the indexed n-grams: narrow down by the rarest token, then check
+        candidates = min((self.postings.get(token, []) for token in tokens), key=len)
+        # Space padding on both sides keeps the match to whole words ("bird" doesn't match "birds")
+        padded = f' {key} '
+        return [p for p in candidates if padded in f" {' '.join(WORD_RE.findall(self.sentences[p].lower()))} "]
+
+    def find(self, phrase):
+        """Sentence containing the phrase as whole words, or None"""
+        tokens = WORD_RE.findall(phrase.lower())
+        if not tokens:
+            return None
+        key = ' '.join(tokens)
+        if len(tokens) <= self.max_n:
+            postings = self.postings.get(key)
+        else:
+            if key not in self.postings:
+                self.postings[key] = self._long_phrase_postings(key, tokens)
+            postings = self.postings[key]
+        if not postings:
+            return None
+
+        # Each posting list is walked past used sentences at most once overall
+        cursor = self._cursors.get(key, 0)
+        while cursor < len(postings) and postings[cursor] in self.used:
+            cursor += 1
+        self._cursors[key] = cursor
+        position = postings[cursor] if cursor < len(postings) else postings[0]
+        self.used.add(position)
+        return self.sentences[position]
+
+def blank_out(sentence, phrase):
+    """Replace the first whole-word, case-insensitive occurrence of phrase with a blank"""
+    pattern = r'\b' + r'\W+'.join(re.escape(token) for token in WORD_RE.findall(phrase)) + r'\b'
+    return re.sub(pattern, "______", sentence, count=1, flags=re.IGNORECASE)
+
+# Large documents are split into chunks of about this many characters and processed in batches
+CHUNK_CHARS = 20000
+CHUNK_BATCH_SIZE = 8
+DEFAULT_GENERATION_WORKERS = 4
+
+def split_into_chunks(text, chunk_chars=CHUNK_CHARS):
+    """Split text into section-sized chunks on paragraph boundaries, cutting oversized paragraphs at sentence ends"""
+    chunks = []
+    current = ''
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        # PDF text often has no blank lines at all, so a "paragraph" can be a whole book
+        while len(paragraph) > chunk_chars:
+            cut = paragraph.rfind('. ', chunk_chars // 2, chunk_chars)
+            cut = cut + 1 if cut != -1 else paragraph.rfind(' ', 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) > chunk_chars:
+            chunks.append(current)
+            current = ''
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+def allocate_questions(chunks, num_questions):
+    """Questions per chunk: proportional to chunk length, or one each for evenly spaced chunks when there are fewer questions than chunks"""
+    if num_questions < len(chunks):
+        step = len(chunks) / num_questions
+        picked = {int(i * step + step / 2) for i in range(num_questions)}
+        return [1 if i in picked else 0 for i in range(len(chunks))]
+
+    total = sum(len(chunk) for chunk in chunks)
+    shares = [num_questions * len(chunk) / total for chunk in chunks]
+    quotas = [int(share) for share in shares]
+    # Largest remainder first; ties go to the earlier chunk
+    for i in sorted(range(len(chunks)), key=lambda i: quotas[i] - shares[i])[:num_questions - sum(quotas)]:
+        quotas[i] += 1
+    return quotas
+
+def _questions_from_chunk(keywords, sentences, engine, limit, rng):
+    """Up to limit (answer, mcq) pairs from one chunk's keywords and sentences"""
+    sentences = [sent for sent in sentences if len(sent) > 20]
+    index = SentenceIndex(sentences)
 
     mcqs = []
-    for i, keyword in enumerate(keywords[:num_questions]):
-        sentence = next((s for s in sentences if keyword.lower() in s.lower()), None)
+    for keyword in keywords:
+        if len(mcqs) >= limit:
+            break
+        sentence = index.find(keyword)
         if not sentence:
             continue
 
-        question = sentence.replace(keyword, "______", 1)
+        question = blank_out(sentence, keyword)
         correct_answer = keyword
-        distractors = random.sample([k for k in keywords if k != keyword], k=3) if len(keywords) > 3 else ["OptionX", "OptionY", "OptionZ"]
+        distractors = pick_distractors(engine, keyword, keywords, rng=rng)
 
         options = [correct_answer] + distractors
-        random.shuffle(options)
+        rng.shuffle(options)
 
-        mcqs.append({
+        mcqs.append((keyword.lower(), {
             "question": question,
             "option_a": options[0],
             "option_b": options[1],
             "option_c": options[2],
             "option_d": options[3],
             "correct_answer": chr(65 + options.index(correct_answer))
-        })
+        }))
+    return mcqs
+
+def _generate_chunk_batch(batch, engine, seed):
+    """Run the models over a batch of (index, chunk, quota) with one call each and build every chunk's questions"""
+    texts = [chunk for _, chunk, _ in batch]
+    top_n = max(20, 3 * max(quota for _, _, quota in batch))
+    keyword_lists = [[kw[0] for kw in keywords] for keywords in nlp_server.keywords_batch(
+        texts, keyphrase_ngram_range=(1, 2), stop_words='english', top_n=top_n)]
+    sentence_lists = nlp_server.sentences_batch(texts)
+    engine = engine.extend([keyword for keywords in keyword_lists for keyword in keywords])
+
+    results = []
+    for (index, _, quota), keywords, sentences in zip(batch, keyword_lists, sentence_lists):
+        # Seeding per chunk keeps the output independent of which worker ran the chunk
+        rng = random.Random(f"{seed}:{index}")
+        # Twice the quota, so chunks that come up short can be topped up from the others
+        results.append((index, _questions_from_chunk(keywords, sentences, engine, 2 * quota, rng)))
+    return results
+
+def generate_mcqs(text, num_questions=5, topic=None, seed=None, workers=None):
+    """Generate MCQs from text using KeyBERT + spaCy, with distractors from the topic's term embeddings.
 
+    The text is split into chunks and the questions spread across them; chunk
+    batches run in a thread pool and the result only depends on the seed.
+    """
+    chunks = split_into_chunks(text)
+    if not chunks or num_questions <= 0:
+        return []
+
+    quotas = allocate_questions(chunks, num_questions)
+    work = [(index, chunk, quota) for index, (chunk, quota) in enumerate(zip(chunks, quotas)) if quota]
+    batches = [work[i:i + CHUNK_BATCH_SIZE] for i in range(0, len(work), CHUNK_BATCH_SIZE)]
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    workers = workers or getattr(settings, 'MCQ_GENERATION_WORKERS', DEFAULT_GENERATION_WORKERS)
+
+    # The topic vocabulary is loaded here so the workers never touch the database
+    engine = get_engine([], topic)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as executor:
+        results = dict(chain.from_iterable(executor.map(lambda batch: _generate_chunk_batch(batch, engine, seed), batches)))
+
+    mcqs = []
+    spares = []
+    answers = set()
+    for index, _, quota in work:
+        taken = 0
+        for answer, mcq in results[index]:
+            if answer in answers:
+                continue
+            if taken < quota:
+                mcqs.append(mcq)
+                answers.add(answer)
+                taken += 1
+            else:
+                spares.append((answer, mcq))
+    for answer, mcq in spares:
+        if len(mcqs) >= num_questions:
+            break
+        if answer not in answers:
+            mcqs.append(mcq)
+            answers.add(answer)
     return mcqs
 
 def normalize_ai_mcqs(ai_mcqs):
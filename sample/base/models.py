@@ -1,11 +1,13 @@
+import hashlib
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, F, Q
 
 
 # Create your models here.
@@ -51,6 +53,41 @@ def save_user_preferences(sender, instance, **kwargs):
     except:
         pass
 
+def compute_content_hash(question, options, correct_answer):
+    """SHA-256 of the case/whitespace-normalized question text and options plus the answer letter, used for dedup
+
+    Options are part of the key because generic stems ("Which of the following
+    is true?") are different questions when their options differ.
+    """
+    normalized = [' '.join(str(text).lower().split()) for text in (question, *options)]
+    return hashlib.sha256('\x00'.join([*normalized, str(correct_answer).strip().upper()]).encode()).hexdigest()
+
+def _instance_content_hash(instance):
+    return compute_content_hash(
+        instance.question, (instance.option1, instance.option2, instance.option3, instance.option4), instance.correct_answer
+    )
+
+def _collides(instance, content_hash):
+    return type(instance).objects.filter(content_hash=content_hash).exclude(pk=instance.pk).exists()
+
+def resolve_content_hash(instance):
+    """Hash to store for a row: legacy duplicates left without one by the migrations keep NULL while they still collide"""
+    content_hash = _instance_content_hash(instance)
+    if instance.pk and instance.content_hash is None and _collides(instance, content_hash):
+        return None
+    return content_hash
+
+def validate_unique_content(instance):
+    """Raise a ValidationError when another row already has the same question, options and answer.
+
+    content_hash isn't editable, so forms (e.g. the admin) never check its unique
+    index themselves; without this an edit that collides fails with IntegrityError.
+    """
+    if instance.pk and instance.content_hash is None:
+        return  # legacy duplicate, see resolve_content_hash()
+    if _collides(instance, _instance_content_hash(instance)):
+        raise ValidationError({'question': 'A question with the same text, options and correct answer already exists.'})
+
 class PDFUpload(models.Model):
 
     # Difficulty level choices
@@ -89,6 +126,14 @@ class PDFUpload(models.Model):
     ])
     uploaded_at = models.DateTimeField(auto_now_add=True)
     approved = models.BooleanField(default=False)
+    content_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    
+    def clean(self):
+        validate_unique_content(self)
+    
+    def save(self, *args, **kwargs):
+        self.content_hash = resolve_content_hash(self)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.topic} - Q{self.question_no}: {self.question[:30]}..."
@@ -178,6 +223,14 @@ class GeneratedMCQ(models.Model):
     ])
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    content_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    
+    def clean(self):
+        validate_unique_content(self)
+    
+    def save(self, *args, **kwargs):
+        self.content_hash = resolve_content_hash(self)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.topic} - Q{self.question_no}: {self.question[:30]}..."
@@ -185,6 +238,116 @@ class GeneratedMCQ(models.Model):
     class Meta:
         ordering = ['topic', 'question_no']
 
+class QuestionBankEntry(models.Model):
+    """Unified, indexed copy of every PDFUpload and GeneratedMCQ row used for quiz assembly"""
+    SOURCE_CHOICES = [
+        ('pdf', 'PDF Upload'),
+        ('gen', 'AI Generated'),
+    ]
+
+    source = models.CharField(max_length=3, choices=SOURCE_CHOICES)
+    source_id = models.PositiveBigIntegerField()
+    topic = models.CharField(max_length=50)
+    subtopic = models.CharField(max_length=100)
+    difficulty = models.CharField(max_length=10)
+    question_no = models.PositiveIntegerField()
+    question = models.TextField()
+    option1 = models.CharField(max_length=255)
+    option2 = models.CharField(max_length=255)
+    option3 = models.CharField(max_length=255)
+    option4 = models.CharField(max_length=255)
+    correct_answer = models.CharField(max_length=1)
+    created_at = models.DateTimeField()
+    minhash = models.BinaryField(null=True, editable=False)  # packed MinHash signature, see near_duplicates.py
+    # Set when the question was saved despite nearly duplicating this entry (near_duplicates='flag')
+    near_duplicate_of = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='near_duplicates')
+
+    @property
+    def key(self):
+        """Question id as used in sessions and moderation forms, e.g. 'pdf_12' or 'gen_34'"""
+        return f"{self.source}_{self.source_id}"
+
+    @classmethod
+    def fields_from(cls, instance):
+        """Build bank field values from a PDFUpload or GeneratedMCQ instance"""
+        return {
+            'topic': instance.topic,
+            'subtopic': instance.subtopic,
+            'difficulty': instance.difficulty,
+            'question_no': instance.question_no,
+            'question': instance.question,
+            'option1': instance.option1,
+            'option2': instance.option2,
+            'option3': instance.option3,
+            'option4': instance.option4,
+            'correct_answer': instance.correct_answer,
+            'created_at': getattr(instance, 'uploaded_at', None) or instance.created_at,
+        }
+
+    def __str__(self):
+        return f"{self.key} - {self.topic}: {self.question[:30]}..."
+
+    class Meta:
+        unique_together = ['source', 'source_id']
+        indexes = [
+            models.Index(fields=['topic', 'subtopic', 'difficulty'], name='bank_topic_sub_diff_idx'),
+        ]
+
+class SharedCounter(models.Model):
+    """Named integer kept in the database so every process (web and worker) sees the same value"""
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def get_value(cls, name, default=0):
+        """Current value, creating the counter at default when it doesn't exist yet"""
+        value = cls.objects.filter(name=name).values_list('value', flat=True).first()
+        if value is None:
+            value = cls.objects.get_or_create(name=name, defaults={'value': default})[0].value
+        return value
+
+    @classmethod
+    def increment(cls, name, amount=1, default=0):
+        """Atomically add amount, so concurrent increments from any process are never lost"""
+        if not cls.objects.filter(name=name).update(value=F('value') + amount):
+            counter, created = cls.objects.get_or_create(name=name, defaults={'value': default + amount})
+            if not created:
+                cls.objects.filter(name=name).update(value=F('value') + amount)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+class QuestionLSHBucket(models.Model):
+    """One LSH band hash of a bank question's MinHash signature, used to find near-duplicate candidates"""
+    entry = models.ForeignKey(QuestionBankEntry, on_delete=models.CASCADE, related_name='lsh_buckets')
+    bucket = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.entry_id} - {self.bucket}"
+
+BANK_SOURCES = {PDFUpload: 'pdf', GeneratedMCQ: 'gen'}
+
+# Keep the question bank in step with both source tables
+@receiver(post_save, sender=PDFUpload)
+@receiver(post_save, sender=GeneratedMCQ)
+def sync_question_bank_entry(sender, instance, **kwargs):
+    entry, _ = QuestionBankEntry.objects.update_or_create(
+        source=BANK_SOURCES[sender],
+        source_id=instance.pk,
+        defaults=QuestionBankEntry.fields_from(instance),
+    )
+    from .near_duplicates import index_entries
+    index_entries([entry])
+    from .question_bank import bump_bank_version
+    bump_bank_version()
+
+@receiver(post_delete, sender=PDFUpload)
+@receiver(post_delete, sender=GeneratedMCQ)
+def delete_question_bank_entry(sender, instance, **kwargs):
+    QuestionBankEntry.objects.filter(source=BANK_SOURCES[sender], source_id=instance.pk).delete()
+    from .question_bank import bump_bank_version
+    bump_bank_version()
+
 class Achievement(models.Model):
     ACHIEVEMENT_TYPES = [
         ('streak', 'Streak'),
@@ -323,3 +486,73 @@ class LearningPathProgress(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.path_name}"
     
+
+class IngestionJob(models.Model):
+    """PDF extraction or AI generation run by the ingest worker (manage.py run_ingestion_worker)"""
+    KIND_CHOICES = [
+        ('pdf_upload', 'PDF Upload'),
+        ('pdf_ai', 'AI Questions from PDF'),
+        ('ai_quiz', 'AI Quiz Generation'),
+        ('topic_request', 'Topic Request Generation'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    params = models.JSONField(default=dict)
+    source_file = models.FileField(upload_to='ingestion_jobs/', blank=True)
+    progress_current = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)  # 0 while the total is unknown
+    progress_message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # touched by the worker while the job runs
+
+    def report_progress(self, current, total=None, message=None):
+        """Persist progress without touching the rest of the row"""
+        self.progress_current = current
+        fields = ['progress_current']
+        if total is not None:
+            self.progress_total = total
+            fields.append('progress_total')
+        if message is not None:
+            self.progress_message = message[:255]
+            fields.append('progress_message')
+        self.save(update_fields=fields)
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': {
+                'current': self.progress_current,
+                'total': self.progress_total,
+                'message': self.progress_message,
+            },
+            'result': self.result,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='ingest_status_created_idx'),
+        ]
@@ -0,0 +1,186 @@
+"""Near-duplicate question detection with MinHash signatures and an LSH bucket index.
+
+Each bank question is reduced to a set of shingles (word 3-grams of the
+question plus its options as an unordered set), summarised by a MinHash
+signature stored on QuestionBankEntry.minhash. The signature is split into
+bands whose hashes go into QuestionLSHBucket, so a lookup only compares an
+incoming question against questions sharing at least one band.
+"""
+import hashlib
+import random
+import re
+import struct
+from collections import defaultdict
+from django.conf import settings
+from django.db.models import Count
+from .models import QuestionBankEntry, QuestionLSHBucket
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # 4 rows per band: pairs above ~0.5 similarity usually share a bucket
+MERSENNE_PRIME = (1 << 61) - 1
+SIGNATURE_FORMAT = f'<{NUM_PERM}Q'
+
+# Fixed seed so signatures stay comparable across processes and deploys
+_rng = random.Random(1729)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+WORD_RE = re.compile(r'\w+')
+LOOKUP_CHUNK_SIZE = 5000
+
+def get_threshold():
+    return getattr(settings, 'NEAR_DUPLICATE_THRESHOLD', 0.8)
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+
+def shingles(question, options=()):
+    """Word 3-grams of the question plus each normalized option, so option order doesn't matter"""
+    words = WORD_RE.findall(str(question).lower())
+    grams = {' '.join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+    grams.update('opt:' + ' '.join(WORD_RE.findall(str(option).lower())) for option in options if option)
+    return grams
+
+def minhash(question, options=()):
+    """MinHash signature as a tuple of NUM_PERM integers"""
+    hashes = [_hash64(s) for s in shingles(question, options)] or [0]
+    return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS)
+
+def pack_signature(signature):
+    return struct.pack(SIGNATURE_FORMAT, *signature)
+
+def unpack_signature(data):
+    return struct.unpack(SIGNATURE_FORMAT, bytes(data))
+
+def band_buckets(signature):
+    """One signed 64-bit bucket key per band"""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<B{ROWS}Q', band, *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_PERM
+
+def entry_options(entry):
+    return (entry.option1, entry.option2, entry.option3, entry.option4)
+
+def index_entries(entries):
+    """Compute and store signatures and LSH buckets for bank entries"""
+    entries = list(entries)
+    buckets = []
+    for entry in entries:
+        signature = minhash(entry.question, entry_options(entry))
+        entry.minhash = pack_signature(signature)
+        buckets.extend(QuestionLSHBucket(entry_id=entry.pk, bucket=b) for b in band_buckets(signature))
+    QuestionBankEntry.objects.bulk_update(entries, ['minhash'], batch_size=1000)
+    QuestionLSHBucket.objects.filter(entry__in=entries).delete()
+    QuestionLSHBucket.objects.bulk_create(buckets, batch_size=5000)
+
+def find_near_duplicates(question, options=(), threshold=None, exclude_ids=()):
+    """Bank entries similar to the given question, as [(entry_id, similarity)], best match first"""
+    threshold = get_threshold() if threshold is None else threshold
+    signature = minhash(question, options)
+    candidate_ids = set(QuestionLSHBucket.objects.filter(
+        bucket__in=band_buckets(signature)
+    ).values_list('entry_id', flat=True)) - set(exclude_ids)
+    if not candidate_ids:
+        return []
+
+    matches = []
+    for entry_id, data in QuestionBankEntry.objects.filter(id__in=candidate_ids).values_list('id', 'minhash'):
+        score = similarity(signature, unpack_signature(data)) if data else 0
+        if score >= threshold:
+            matches.append((entry_id, score))
+    return sorted(matches, key=lambda match: -match[1])
+
+def find_batch_near_duplicates(questions, threshold=None):
+    """Find what each (question, options) pair nearly duplicates: a bank entry or an earlier pair in the batch.
+
+    Returns one item per pair: None, ('entry', bank entry id) or ('batch', index
+    of the earlier pair), picking the most similar match and preferring bank
+    entries. Uses one bucket query and one signature query for the whole batch.
+    """
+    threshold = get_threshold() if threshold is None else threshold
+    signatures = [minhash(question, options) for question, options in questions]
+    batch_buckets = [band_buckets(signature) for signature in signatures]
+
+    bucket_entries = defaultdict(set)
+    all_buckets = list({bucket for buckets in batch_buckets for bucket in buckets})
+    for start in range(0, len(all_buckets), LOOKUP_CHUNK_SIZE):
+        rows = QuestionLSHBucket.objects.filter(
+            bucket__in=all_buckets[start:start + LOOKUP_CHUNK_SIZE]
+        ).values_list('bucket', 'entry_id')
+        for bucket, entry_id in rows:
+            bucket_entries[bucket].add(entry_id)
+
+    candidate_ids = set().union(*bucket_entries.values())
+    bank_signatures = {
+        entry_id: unpack_signature(data)
+        for entry_id, data in QuestionBankEntry.objects.filter(id__in=candidate_ids).values_list('id', 'minhash')
+        if data
+    } if candidate_ids else {}
+
+    matches = []
+    earlier = defaultdict(list)  # bucket -> indexes of earlier questions in this batch
+    for index, (signature, buckets) in enumerate(zip(signatures, batch_buckets)):
+        entry_ids = {entry_id for bucket in buckets for entry_id in bucket_entries.get(bucket, ())}
+        batch_ids = {other for bucket in buckets for other in earlier[bucket]}
+        entry_scores = [(similarity(signature, bank_signatures[entry_id]), entry_id)
+                        for entry_id in entry_ids if entry_id in bank_signatures]
+        batch_scores = [(similarity(signature, signatures[other]), other) for other in batch_ids]
+        best_entry = max(entry_scores, default=(0.0, None))
+        best_batch = max(batch_scores, default=(0.0, None))
+        if best_entry[0] >= threshold:
+            matches.append(('entry', best_entry[1]))
+        elif best_batch[0] >= threshold:
+            matches.append(('batch', best_batch[1]))
+        else:
+            matches.append(None)
+        for bucket in buckets:
+            earlier[bucket].append(index)
+    return matches
+
+def cluster_near_duplicates(threshold=None):
+    """Group the whole bank into near-duplicate clusters in one pass over shared LSH buckets"""
+    threshold = get_threshold() if threshold is None else threshold
+    shared = QuestionLSHBucket.objects.values('bucket').annotate(size=Count('id')).filter(size__gt=1).values('bucket')
+    members = defaultdict(list)
+    for bucket, entry_id in QuestionLSHBucket.objects.filter(bucket__in=shared).values_list('bucket', 'entry_id').iterator():
+        members[bucket].append(entry_id)
+
+    entry_ids = {entry_id for ids in members.values() for entry_id in ids}
+    signatures = {
+        entry_id: unpack_signature(data)
+        for entry_id, data in QuestionBankEntry.objects.filter(id__in=entry_ids).values_list('id', 'minhash')
+        if data
+    }
+
+    # Union-find over verified candidate pairs
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    checked = set()
+    for ids in members.values():
+        for i, a in enumerate(ids):
+            for b in ids[i + 1:]:
+                pair = (min(a, b), max(a, b))
+                if pair in checked or a not in signatures or b not in signatures:
+                    continue
+                checked.add(pair)
+                if similarity(signatures[a], signatures[b]) >= threshold:
+                    parent[find(a)] = find(b)
+
+    clusters = defaultdict(list)
+    for entry_id in parent:
+        clusters[find(entry_id)].append(entry_id)
+    return sorted((sorted(ids) for ids in clusters.values() if len(ids) > 1), key=len, reverse=True)
@@ -0,0 +1,136 @@
+"""Process-wide registry of the NLP models used for MCQ generation.
+
+spaCy and KeyBERT are loaded on first use, once per process, and shared by
+nlp_utils and ml_utils. Web workers that never generate MCQs never import
+them; the ingest worker can load them up front with warm_up().
+"""
+import threading
+import time
+
+SPACY_MODEL = 'en_core_web_sm'
+# Everything en_core_web_sm ships except senter; sentence boundaries are all MCQ generation needs from spaCy
+UNUSED_COMPONENTS = ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner']
+SENTENCE_PIPELINES = ('senter', 'sentencizer', 'full')
+# Long texts are fed to nlp.pipe in pieces of at most this many characters, this many pieces at a time
+SEGMENT_CHARS = 100000
+SENTENCE_BATCH_SIZE = 32
+
+def load_sentence_pipeline(mode='senter', model=None):
+    """spaCy pipeline for sentence segmentation.
+
+    'senter' keeps only the model's statistical sentence recognizer, 'sentencizer'
+    is the punctuation rule on a blank pipeline, and 'full' is the whole model
+    with the dependency parser setting boundaries. model is a spaCy package name
+    or path, SPACY_MODEL by default.
+    """
+    import spacy
+    model = model or SPACY_MODEL
+    if mode == 'full':
+        return spacy.load(model)
+    if mode == 'senter':
+        nlp = spacy.load(model, exclude=UNUSED_COMPONENTS)
+        nlp.enable_pipe('senter')
+        return nlp
+    if mode == 'sentencizer':
+        nlp = spacy.blank('en')
+        nlp.add_pipe('sentencizer')
+        return nlp
+    raise ValueError(f"Unknown sentence pipeline '{mode}', expected one of {SENTENCE_PIPELINES}")
+
+def _load_spacy():
+    from django.conf import settings
+    return load_sentence_pipeline(getattr(settings, 'SPACY_SENTENCE_PIPELINE', 'senter'))
+
+def _load_keybert():
+    from keybert import KeyBERT
+    return KeyBERT()
+
+MODEL_LOADERS = {
+    'spacy': _load_spacy,
+    'keybert': _load_keybert,
+}
+
+_models = {}
+_metrics = {}
+_lock = threading.Lock()
+
+def get_model(name):
+    """Return a loaded model, loading it on first use"""
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            start = time.perf_counter()
+            model = MODEL_LOADERS[name]()
+            _metrics[name] = {'load_seconds': round(time.perf_counter() - start, 3), 'loaded_at': time.time(), 'uses': 0}
+            _models[name] = model
+            print(f"DEBUG: Loaded NLP model '{name}' in {_metrics[name]['load_seconds']}s")
+    return model
+
+def _use(name):
+    model = get_model(name)
+    _metrics[name]['uses'] += 1
+    return model
+
+def get_spacy():
+    return _use('spacy')
+
+def get_keybert():
+    return _use('keybert')
+
+def warm_up(names=None):
+    """Load models ahead of the first request that needs them; returns their metrics"""
+    for name in names or MODEL_LOADERS:
+        get_model(name)
+    return model_metrics()
+
+def model_metrics():
+    """Load time, load timestamp and use count per model; unloaded models are reported as such"""
+    return {name: dict(_metrics[name], loaded=True) if name in _metrics else {'loaded': False} for name in MODEL_LOADERS}
+
+def extract_keywords_batch(texts, **kwargs):
+    """KeyBERT keywords for several documents at once, as one [(keyword, score), ...] list per text"""
+    if not texts:
+        return []
+    keywords = get_keybert().extract_keywords(list(texts), **kwargs)
+    # KeyBERT unwraps the result when it is given a single document
+    return [keywords] if len(texts) == 1 else keywords
+
+def split_text(text, max_chars=SEGMENT_CHARS):
+    """Cut text into pieces of at most max_chars, at line breaks where possible"""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind('\n', 0, max_chars)
+        cut = cut if cut > 0 else text.rfind(' ', 0, max_chars)
+        cut = cut if cut > 0 else max_chars
+        pieces.append(text[:cut])
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+def split_sentences_batch(texts, nlp=None):
+    """spaCy sentence texts for several documents.
+
+    Documents are cut into bounded pieces (nlp.max_length is 1M characters) and
+    parsed with nlp.pipe in batches of SENTENCE_BATCH_SIZE pieces.
+    """
+    nlp = nlp or get_spacy()
+    owners = []
+    pieces = []
+    for i, text in enumerate(texts):
+        for piece in split_text(text):
+            owners.append(i)
+            pieces.append(piece)
+
+    results = [[] for _ in texts]
+    for owner, doc in zip(owners, nlp.pipe(pieces, batch_size=SENTENCE_BATCH_SIZE)):
+        results[owner].extend(sent.text for sent in doc.sents)
+    return results
+
+def embed_batch(texts):
+    """Sentence embeddings for several texts from KeyBERT's embedding backend, one row per text"""
+    if not texts:
+        return []
+    return get_keybert().model.embed(list(texts))
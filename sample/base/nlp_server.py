@@ -0,0 +1,229 @@
+"""Optional local NLP inference server, and the client used by nlp_utils and ml_utils.
+
+`manage.py run_nlp_server` keeps spaCy and KeyBERT resident in one process
+and serves keyword extraction and sentence segmentation over a Unix socket
+(settings.NLP_SERVER_SOCKET), so web workers don't each hold a copy. Requests
+arriving within --batch-wait seconds of each other run as one model call.
+
+The protocol is one JSON object per line in each direction:
+    {"op": "keywords", "text": "...", "kwargs": {...}}  ->  {"ok": true, "result": [[keyword, score], ...]}
+    {"op": "sentences", "text": "..."}                  ->  {"ok": true, "result": ["sentence", ...]}
+    {"op": "embed", "text": "..."}                      ->  {"ok": true, "result": [0.12, -0.03, ...]}
+
+Any op also accepts "texts": [...] in place of "text" and then returns a list
+with one result per text.
+
+The client functions call the server when its socket is there and fall back
+to the in-process models otherwise.
+"""
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from django.conf import settings
+from .nlp_models import embed_batch, extract_keywords_batch, split_sentences_batch
+
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_BATCH_WAIT = 0.01  # seconds to wait for more requests before running a batch
+DEFAULT_TIMEOUT = 60
+OPS = ('keywords', 'sentences', 'embed')
+
+def get_socket_path():
+    return getattr(settings, 'NLP_SERVER_SOCKET', None)
+
+# Client
+
+class NLPServerUnavailable(Exception):
+    pass
+
+def _call_server(request):
+    path = get_socket_path()
+    if not path or not os.path.exists(path):
+        raise NLPServerUnavailable('NLP server socket not found')
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(getattr(settings, 'NLP_SERVER_TIMEOUT', DEFAULT_TIMEOUT))
+            sock.connect(path)
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+    except OSError as e:
+        raise NLPServerUnavailable(str(e))
+    if not line:
+        raise NLPServerUnavailable('NLP server closed the connection')
+
+    response = json.loads(line)
+    if not response['ok']:
+        raise RuntimeError(f"NLP server error: {response['error']}")
+    return response['result']
+
+def keywords_batch(texts, **kwargs):
+    """KeyBERT (keyword, score) pairs for each text, from the NLP server or in-process"""
+    try:
+        results = _call_server({'op': 'keywords', 'texts': list(texts), 'kwargs': kwargs})
+        return [[tuple(kw) for kw in result] for result in results]
+    except NLPServerUnavailable:
+        return extract_keywords_batch(texts, **kwargs)
+
+def sentences_batch(texts):
+    """spaCy sentence texts for each text, from the NLP server or in-process"""
+    try:
+        return _call_server({'op': 'sentences', 'texts': list(texts)})
+    except NLPServerUnavailable:
+        return split_sentences_batch(texts)
+
+def keywords(text, **kwargs):
+    """KeyBERT (keyword, score) pairs for one text"""
+    return keywords_batch([text], **kwargs)[0]
+
+def sentences(text):
+    """spaCy sentence texts for one text"""
+    return sentences_batch([text])[0]
+
+def embeddings(texts, fallback=True):
+    """One embedding vector per text, from the NLP server or, with fallback, in-process"""
+    try:
+        return _call_server({'op': 'embed', 'texts': list(texts)})
+    except NLPServerUnavailable:
+        if not fallback:
+            raise
+        return embed_batch(texts)
+
+# Server
+
+def validate_request(request):
+    """Error message for a malformed request, or None when the batcher can run it"""
+    if not isinstance(request, dict):
+        return 'Request must be a JSON object'
+    if request.get('op') not in OPS:
+        return f"Unknown op: {request.get('op')}"
+    if 'texts' in request:
+        texts = request['texts']
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return "'texts' must be a list of strings"
+    elif not isinstance(request.get('text'), str):
+        return "'text' must be a string"
+    if not isinstance(request.get('kwargs') or {}, dict):
+        return "'kwargs' must be an object"
+    return None
+
+class RequestBatcher:
+    """Collects requests from connection threads and runs them in batches on one thread"""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, batch_wait=DEFAULT_BATCH_WAIT):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.processed = 0
+
+    def submit(self, request):
+        """Queue a request and block until its batch has run; returns the response dict"""
+        item = {'request': request, 'done': threading.Event(), 'response': None}
+        self.requests.put(item)
+        item['done'].wait()
+        return item['response']
+
+    def run(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._process(batch)
+            except Exception as e:
+                # Never let one batch stop the thread: every later request would hang until the client times out
+                print(f"DEBUG: NLP server batch failed: {e}")
+                for item in batch:
+                    if not item['done'].is_set():
+                        item['response'] = {'ok': False, 'error': str(e)}
+                        item['done'].set()
+
+    def _process(self, batch):
+        # Requests can only share a model call when they use the same op and options
+        groups = {}
+        for item in batch:
+            request = item['request']
+            key = (request.get('op'), json.dumps(request.get('kwargs') or {}, sort_keys=True))
+            groups.setdefault(key, []).append(item)
+
+        for (op, _), items in groups.items():
+            # A request carries either one 'text' or a list of 'texts'; run them all in one call and split the results back
+            sizes = [len(item['request']['texts']) if 'texts' in item['request'] else 1 for item in items]
+            texts = [text for item in items for text in item['request'].get('texts', [item['request'].get('text', '')])]
+            try:
+                if op == 'keywords':
+                    kwargs = dict(items[0]['request'].get('kwargs') or {})
+                    # JSON turns tuples into lists; scikit-learn wants a tuple here
+                    if 'keyphrase_ngram_range' in kwargs:
+                        kwargs['keyphrase_ngram_range'] = tuple(kwargs['keyphrase_ngram_range'])
+                    results = extract_keywords_batch(texts, **kwargs)
+                elif op == 'sentences':
+                    results = split_sentences_batch(texts)
+                elif op == 'embed':
+                    results = [vector.tolist() for vector in embed_batch(texts)]
+                else:
+                    raise ValueError(f'Unknown op: {op}')
+                responses = []
+                offset = 0
+                for item, size in zip(items, sizes):
+                    result = results[offset:offset + size]
+                    responses.append({'ok': True, 'result': result if 'texts' in item['request'] else result[0]})
+                    offset += size
+            except Exception as e:
+                responses = [{'ok': False, 'error': str(e)}] * len(items)
+            for item, response in zip(items, responses):
+                item['response'] = response
+                item['done'].set()
+
+        self.batches += 1
+        self.processed += len(batch)
+
+class NLPRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {'ok': False, 'error': 'Invalid JSON'}
+            else:
+                error = validate_request(request)
+                if error:
+                    response = {'ok': False, 'error': error}
+                else:
+                    response = self.server.batcher.submit(request)
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+
+class NLPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, batcher):
+        self.batcher = batcher
+        # A socket file left behind by a previous run would make bind() fail
+        if os.path.exists(path):
+            os.unlink(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        super().__init__(path, NLPRequestHandler)
+        os.chmod(path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+def serve(path=None, batch_size=DEFAULT_BATCH_SIZE, batch_wait=DEFAULT_BATCH_WAIT):
+    """Run the NLP server until interrupted"""
+    batcher = RequestBatcher(batch_size, batch_wait)
+    threading.Thread(target=batcher.run, daemon=True).start()
+    with NLPServer(path or get_socket_path(), batcher) as server:
+        server.serve_forever()
@@ -1,14 +1,9 @@
-import spacy
-from keybert import KeyBERT
-
-nlp = spacy.load("en_core_web_sm")
-kw_model = KeyBERT()
+from . import nlp_server
 
 def extract_keywords(text, top_n=5):
     """Extract keywords using KeyBERT"""
-    return [kw[0] for kw in kw_model.extract_keywords(text, top_n=top_n)]
+    return [kw[0] for kw in nlp_server.keywords(text, top_n=top_n)]
 
 def clean_sentences(text):
     """Split into sentences using spaCy"""
-    doc = nlp(text)
-    return [sent.text.strip() for sent in doc.sents if len(sent.text.strip()) > 10]
+    return [sent.strip() for sent in nlp_server.sentences(text) if len(sent.strip()) > 10]
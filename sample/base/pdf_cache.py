@@ -0,0 +1,89 @@
+"""Content-addressed disk cache for text and MCQs extracted from PDFs.
+
+Entries are named by the SHA-256 of the PDF bytes, so a re-upload of the same
+file under a different topic or difficulty skips extraction. The cache is
+bounded by settings.PDF_CACHE_MAX_BYTES; the least recently used entries
+(by mtime, refreshed on every hit) are evicted first.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from django.conf import settings
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def get_cache_dir():
+    return getattr(settings, 'PDF_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'pdf'))
+
+def file_digest(pdf_file):
+    """SHA-256 of an uploaded or opened file, read in chunks; the file is rewound afterwards"""
+    digest = hashlib.sha256()
+    pdf_file.seek(0)
+    for chunk in iter(lambda: pdf_file.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    pdf_file.seek(0)
+    return digest.hexdigest()
+
+def _entry_path(digest, kind):
+    return os.path.join(get_cache_dir(), digest[:2], f"{digest}.{kind}.jsonl")
+
+def read_entry(digest, kind):
+    """Yield the JSON records of a cached entry, or return None on a miss"""
+    path = _entry_path(digest, kind)
+    try:
+        f = open(path, encoding='utf-8')
+    except FileNotFoundError:
+        return None
+    os.utime(path)  # mark as recently used
+    return _iter_records(f)
+
+def _iter_records(f):
+    with f:
+        for line in f:
+            yield json.loads(line)
+
+@contextmanager
+def write_entry(digest, kind):
+    """Write an entry record by record; it only becomes visible if the block completes"""
+    path = _entry_path(digest, kind)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            yield lambda record: f.write(json.dumps(record) + '\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    evict()
+
+def evict(max_bytes=None):
+    """Delete least recently used entries until the cache fits in max_bytes"""
+    max_bytes = max_bytes or getattr(settings, 'PDF_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+    entries = []
+    total = 0
+    for root, _, files in os.walk(get_cache_dir()):
+        for name in files:
+            if not name.endswith('.jsonl'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    if total <= max_bytes:
+        return
+
+    for _, size, path in sorted(entries):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        if total <= max_bytes:
+            break
@@ -0,0 +1,193 @@
+import hashlib
+import random
+import time
+from django.core.cache import cache
+from django.db.models import Count, Q
+from .models import QuestionBankEntry, PDFUpload, GeneratedMCQ, SharedCounter
+
+SOURCE_LABELS = {'pdf': 'pdf', 'gen': 'generated'}
+SOURCE_MODELS = {'pdf': PDFUpload, 'gen': GeneratedMCQ}
+
+# Cached lookups live in each process's local cache, namespaced by a bank version that
+# is kept in the database: a write in any process (e.g. the ingest worker) bumps it,
+# and every other process stops reading the old entries on its next lookup.
+BANK_VERSION_KEY = 'question_bank_version'
+# Bucket ID arrays are cached in fixed-size pages so sampling only loads the pages it needs
+BUCKET_PAGE_SIZE = 1000
+BUCKET_TIMEOUT = 600  # 10 minutes
+CATALOG_TIMEOUT = 3600  # 1 hour, writes bump the version anyway
+QUESTION_TIMEOUT = 3600  # 1 hour, writes bump the version anyway
+
+def get_bank_version():
+    """Current question bank version, used to namespace every cached bank lookup"""
+    # Start from a timestamp so a recreated counter can never reuse an old namespace
+    return SharedCounter.get_value(BANK_VERSION_KEY, default=int(time.time() * 1000))
+
+def bump_bank_version():
+    """Invalidate every cached bank lookup, in all processes, after a question is written or deleted"""
+    SharedCounter.increment(BANK_VERSION_KEY, default=int(time.time() * 1000))
+
+def filter_bank(topic, subtopic='', difficulty=''):
+    """Filter the question bank by topic and optional subtopic/difficulty (served by one composite index)"""
+    entries = QuestionBankEntry.objects.filter(topic=topic)
+    if subtopic:
+        entries = entries.filter(subtopic=subtopic)
+    if difficulty:
+        entries = entries.filter(difficulty=difficulty)
+    return entries
+
+def get_catalog():
+    """Topic/subtopic/difficulty catalog built with one GROUP BY and cached per bank version"""
+    catalog_key = f'bank_catalog_{get_bank_version()}'
+    catalog = cache.get(catalog_key)
+    if catalog is not None:
+        return catalog
+
+    topic_subtopics = {}
+    subtopic_difficulties = {}
+    total_questions = 0
+    rows = QuestionBankEntry.objects.values('topic', 'subtopic', 'difficulty').annotate(count=Count('id')).order_by()
+    for row in rows:
+        subtopics = topic_subtopics.setdefault(row['topic'], [])
+        if row['subtopic'] not in subtopics:
+            subtopics.append(row['subtopic'])
+        subtopic_difficulties.setdefault(f"{row['topic']}_{row['subtopic']}", []).append(row['difficulty'])
+        total_questions += row['count']
+
+    catalog = {
+        'topics': sorted(topic_subtopics),
+        'topic_subtopics': topic_subtopics,
+        'subtopic_difficulties': subtopic_difficulties,
+        'total_questions': total_questions,
+    }
+    cache.set(catalog_key, catalog, CATALOG_TIMEOUT)
+    return catalog
+
+def question_payload(entry):
+    """Convert a bank entry into the question dict used by the quiz templates"""
+    return {
+        'id': entry.key,
+        'source': SOURCE_LABELS[entry.source],
+        'topic': entry.topic,
+        'subtopic': entry.subtopic,
+        'difficulty': entry.difficulty,
+        'question_no': entry.question_no,
+        'question_text': entry.question,
+        'optionA': entry.option1,
+        'optionB': entry.option2,
+        'optionC': entry.option3,
+        'optionD': entry.option4,
+        'correct_answer': entry.correct_answer
+    }
+
+def split_question_keys(keys):
+    """Group question ids like 'pdf_12' by source prefix, e.g. {'pdf': [12], 'gen': [34]}"""
+    groups = {}
+    for key in keys:
+        source, _, pk = key.partition('_')
+        if source in SOURCE_LABELS and pk.isdigit():
+            groups.setdefault(source, []).append(int(pk))
+    return groups
+
+def _question_cache_key(key, version):
+    return f'bank_question_{version}_{key}'
+
+def cache_question_payloads(payloads, version=None):
+    """Store question dicts so quiz pages can load them by id without a query"""
+    version = version or get_bank_version()
+    cache.set_many({_question_cache_key(p['id'], version): p for p in payloads}, QUESTION_TIMEOUT)
+
+def get_question_payloads(keys):
+    """Load question dicts by id ('pdf_12', 'gen_34') for display, serving repeats from the cache"""
+    version = get_bank_version()
+    cached = cache.get_many([_question_cache_key(key, version) for key in keys])
+    payloads = {key: cached[_question_cache_key(key, version)] for key in keys if _question_cache_key(key, version) in cached}
+
+    by_source = split_question_keys([key for key in keys if key not in payloads])
+    if by_source:
+        query = Q()
+        for source, ids in by_source.items():
+            query |= Q(source=source, source_id__in=ids)
+        fetched = [question_payload(entry) for entry in QuestionBankEntry.objects.filter(query)]
+        cache_question_payloads(fetched, version)
+        payloads.update({p['id']: p for p in fetched})
+    return payloads
+
+def get_correct_answers(keys):
+    """Current correct answer per question id, read from the source tables so grading
+    always matches build_answer_review(); deleted questions are missing from the result"""
+    answers = {}
+    for source, ids in split_question_keys(keys).items():
+        for pk, correct_answer in SOURCE_MODELS[source].objects.filter(pk__in=ids).values_list('pk', 'correct_answer'):
+            answers[f"{source}_{pk}"] = correct_answer
+    return answers
+
+def build_answer_review(answers):
+    """Build review details for (question_id, user_answer) pairs with one in_bulk query per source
+
+    Rows are read from the source tables so the review always shows the current
+    correct answer; questions deleted since the quiz are skipped and the original
+    answer order is kept.
+    """
+    rows = {
+        source: SOURCE_MODELS[source].objects.in_bulk(ids)
+        for source, ids in split_question_keys([question_id for question_id, _ in answers]).items()
+    }
+    review = []
+    for question_id, user_answer in answers:
+        source, _, pk = question_id.partition('_')
+        q = rows.get(source, {}).get(int(pk)) if pk.isdigit() else None
+        if q is None:
+            continue
+        review.append({
+            'question_id': question_id,
+            'question': q.question,
+            'user_answer': user_answer,
+            'correct_answer': q.correct_answer,
+            'options': {'A': q.option1, 'B': q.option2, 'C': q.option3, 'D': q.option4}
+        })
+    return review
+
+def _bucket_key(topic, subtopic, difficulty, version):
+    bucket = hashlib.md5(f"{topic}\x00{subtopic}\x00{difficulty}".encode()).hexdigest()
+    return f'bank_bucket_{version}_{bucket}'
+
+def _build_bucket(bucket_key, topic, subtopic, difficulty):
+    """Load a bucket's IDs with one index-only query and cache them page by page"""
+    ids = list(filter_bank(topic, subtopic, difficulty).order_by().values_list('id', flat=True))
+    pages = {
+        f'{bucket_key}_{start // BUCKET_PAGE_SIZE}': ids[start:start + BUCKET_PAGE_SIZE]
+        for start in range(0, len(ids), BUCKET_PAGE_SIZE)
+    }
+    cache.set_many(pages, BUCKET_TIMEOUT)
+    cache.set(bucket_key, len(ids), BUCKET_TIMEOUT)
+    return len(ids), pages
+
+def sample_question_ids(topic, subtopic='', difficulty='', k=10, version=None):
+    """Pick k random bank IDs from a (topic, subtopic, difficulty) bucket without scanning it"""
+    bucket_key = _bucket_key(topic, subtopic, difficulty, version or get_bank_version())
+    count = cache.get(bucket_key)
+    pages = {}
+    if count is None:
+        count, pages = _build_bucket(bucket_key, topic, subtopic, difficulty)
+
+    positions = random.sample(range(count), min(k, count))
+    page_keys = {f'{bucket_key}_{pos // BUCKET_PAGE_SIZE}' for pos in positions}
+    if not pages:
+        pages = cache.get_many(page_keys)
+        if len(pages) < len(page_keys):
+            # A page was evicted, so rebuild the bucket and sample again
+            count, pages = _build_bucket(bucket_key, topic, subtopic, difficulty)
+            positions = random.sample(range(count), min(k, count))
+
+    return [pages[f'{bucket_key}_{pos // BUCKET_PAGE_SIZE}'][pos % BUCKET_PAGE_SIZE] for pos in positions]
+
+def get_quiz_questions(topic, subtopic='', difficulty='', num_questions=10):
+    """Pick up to num_questions random questions for a quiz, fetching only the sampled rows"""
+    version = get_bank_version()
+    ids = sample_question_ids(topic, subtopic, difficulty, num_questions, version)
+    entries = QuestionBankEntry.objects.in_bulk(ids)
+    # Rows deleted since the bucket was cached are simply skipped
+    questions = [question_payload(entries[pk]) for pk in ids if pk in entries]
+    cache_question_payloads(questions, version)
+    return questions
@@ -0,0 +1,192 @@
+"""Shared write path for extracted and AI-generated MCQs.
+
+Every writer hands its batch to save_mcqs(), which validates and normalizes
+the questions, drops exact and (optionally) near duplicates, and inserts the
+rest with bulk_create inside one transaction, together with their question
+bank rows and LSH buckets.
+"""
+import re
+from itertools import islice
+from django.db import transaction
+from django.db.models import Max
+from .models import GeneratedMCQ, QuestionBankEntry, compute_content_hash
+from .near_duplicates import find_batch_near_duplicates, index_entries
+from .question_bank import bump_bank_version
+
+OPTION_KEYS = ('option_a', 'option_b', 'option_c', 'option_d')
+VALID_ANSWERS = ('A', 'B', 'C', 'D')
+OPTION_MAX_LENGTH = 255
+BULK_BATCH_SIZE = 500
+STREAM_CHUNK_SIZE = 500
+# Near-duplicate pairs listed in a result; every flagged question is also marked on its bank entry
+MAX_REPORTED_PAIRS = 50
+
+# "A) text", "b. text", "(C) text" as produced by the AI generator
+OPTION_PREFIX_RE = re.compile(r'^\s*\(?[A-Da-d][).:]\s*')
+
+def normalize_option(option):
+    """Strip a leading "A) " style label from an option"""
+    return OPTION_PREFIX_RE.sub('', str(option), count=1).strip()
+
+def normalize_mcq(mcq):
+    """Return {'question', 'options', 'correct_answer'} or None if the MCQ is unusable.
+
+    Accepts both the extractor format (option_a..option_d) and the AI format
+    (an 'options' list whose items carry "A) " labels).
+    """
+    if mcq.get('options') is not None:
+        options = [normalize_option(option) for option in mcq['options'][:4]]
+    else:
+        options = [str(mcq.get(key) or '').strip() for key in OPTION_KEYS]
+    question = str(mcq.get('question') or '').strip()
+    correct_answer = str(mcq.get('correct_answer') or '').strip().upper()[:1]
+
+    if not question or len(options) != 4 or not all(options):
+        return None
+    if any(len(option) > OPTION_MAX_LENGTH for option in options) or correct_answer not in VALID_ANSWERS:
+        return None
+    return {'question': question, 'options': options, 'correct_answer': correct_answer}
+
+def save_mcqs(mcqs, topic, subtopic, difficulty, created_by, near_duplicates='flag', question_no_start=1):
+    """Validate, dedup and bulk insert a batch of MCQs as GeneratedMCQ rows.
+
+    near_duplicates is 'flag' (save them, recording the matched entry in
+    QuestionBankEntry.near_duplicate_of) or 'skip' (drop them).
+    Returns a dict of counts: received, invalid, duplicates, existing, near_duplicates, saved,
+    plus near_duplicate_pairs: up to MAX_REPORTED_PAIRS of {'question': new key or None
+    when skipped, 'text', 'duplicate_of': existing key}.
+    """
+    stats = {'received': len(mcqs), 'invalid': 0, 'duplicates': 0, 'existing': 0, 'near_duplicates': 0, 'saved': 0,
+             'near_duplicate_pairs': []}
+
+    # Validate and drop duplicates within the batch
+    pending = {}
+    for idx, mcq in enumerate(mcqs, question_no_start):
+        normalized = normalize_mcq(mcq)
+        if normalized is None:
+            stats['invalid'] += 1
+            continue
+        content_hash = compute_content_hash(normalized['question'], normalized['options'], normalized['correct_answer'])
+        if content_hash in pending:
+            stats['duplicates'] += 1
+            continue
+        pending[content_hash] = (idx, normalized)
+
+    # Drop questions already in the database with one indexed IN lookup
+    existing_hashes = set(GeneratedMCQ.objects.filter(
+        content_hash__in=list(pending)
+    ).values_list('content_hash', flat=True))
+    stats['existing'] = len(existing_hashes)
+    rows = [(content_hash, idx, normalized) for content_hash, (idx, normalized) in pending.items()
+            if content_hash not in existing_hashes]
+
+    candidates = rows
+    matches = find_batch_near_duplicates([(normalized['question'], normalized['options']) for _, _, normalized in candidates])
+    stats['near_duplicates'] = sum(match is not None for match in matches)
+    if near_duplicates == 'skip':
+        rows = [row for row, match in zip(rows, matches) if match is None]
+
+    if not rows:
+        _record_near_duplicates(stats, candidates, matches, {}, flag=False)
+        return stats
+
+    objects = [
+        GeneratedMCQ(
+            topic=topic,
+            subtopic=subtopic,
+            difficulty=difficulty,
+            question_no=idx,
+            question=normalized['question'],
+            option1=normalized['options'][0],
+            option2=normalized['options'][1],
+            option3=normalized['options'][2],
+            option4=normalized['options'][3],
+            correct_answer=normalized['correct_answer'],
+            created_by=created_by,
+            content_hash=content_hash,
+        )
+        for content_hash, idx, normalized in rows
+    ]
+
+    # bulk_create skips post_save, so the bank rows and LSH buckets are written here too.
+    # ignore_conflicts lets a concurrent writer win a content hash without failing the batch.
+    with transaction.atomic():
+        last_id = GeneratedMCQ.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        GeneratedMCQ.objects.bulk_create(objects, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+        # MySQL doesn't return primary keys from bulk_create, so read them back by hash. Only ids
+        # above last_id from this user are ours; a row a concurrent writer won the hash with is not.
+        created = list(GeneratedMCQ.objects.filter(
+            content_hash__in=[obj.content_hash for obj in objects], created_by=created_by, id__gt=last_id,
+        ))
+        QuestionBankEntry.objects.bulk_create([
+            QuestionBankEntry(source='gen', source_id=mcq.pk, **QuestionBankEntry.fields_from(mcq))
+            for mcq in created
+        ], batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+        entries = {entry.source_id: entry for entry in QuestionBankEntry.objects.filter(source='gen', source_id__in=[mcq.pk for mcq in created])}
+        index_entries(entries.values())
+        entry_ids = {mcq.content_hash: entries[mcq.pk].id for mcq in created if mcq.pk in entries}
+        _record_near_duplicates(stats, candidates, matches, entry_ids, flag=near_duplicates != 'skip')
+
+    bump_bank_version()
+    stats['saved'] = len(created)
+    return stats
+
+def _record_near_duplicates(stats, candidates, matches, entry_ids, flag):
+    """Resolve each near-duplicate to the bank entry it matches, mark saved ones and list the pairs in stats.
+
+    entry_ids maps the content hash of every saved candidate to its new bank entry id.
+    """
+    targets = []  # per candidate, the bank entry id it nearly duplicates
+    for (content_hash, _, normalized), match in zip(candidates, matches):
+        if match is None:
+            targets.append(None)
+        elif match[0] == 'entry':
+            targets.append(match[1])
+        else:
+            # An earlier question in the batch: its own entry if it was saved, else whatever it matched
+            earlier_hash = candidates[match[1]][0]
+            targets.append(entry_ids.get(earlier_hash) or targets[match[1]])
+
+    flagged = [(entry_ids.get(content_hash), normalized, target)
+               for (content_hash, _, normalized), target in zip(candidates, targets) if target is not None]
+    if not flagged:
+        return
+
+    if flag:
+        by_target = {}
+        for entry_id, _, target in flagged:
+            if entry_id is not None:
+                by_target.setdefault(target, []).append(entry_id)
+        for target, ids in by_target.items():
+            QuestionBankEntry.objects.filter(id__in=ids).update(near_duplicate_of_id=target)
+
+    reported = flagged[:MAX_REPORTED_PAIRS]
+    ids = {entry_id for entry_id, _, _ in reported if entry_id} | {target for _, _, target in reported}
+    keys = {pk: f"{source}_{source_id}" for pk, source, source_id
+            in QuestionBankEntry.objects.filter(id__in=ids).values_list('id', 'source', 'source_id')}
+    stats['near_duplicate_pairs'] = [
+        {'question': keys.get(entry_id), 'text': normalized['question'][:100], 'duplicate_of': keys.get(target)}
+        for entry_id, normalized, target in reported
+    ]
+
+def save_mcq_stream(mcqs, topic, subtopic, difficulty, created_by, near_duplicates='flag', chunk_size=STREAM_CHUNK_SIZE,
+                    progress=None):
+    """save_mcqs() over an iterable of MCQs, one chunk at a time, so the whole stream is never held in memory.
+
+    progress, if given, is called with the running totals after each chunk.
+    """
+    mcqs = iter(mcqs)
+    totals = None
+    question_no = 1
+    while True:
+        chunk = list(islice(mcqs, chunk_size))
+        if not chunk:
+            break
+        stats = save_mcqs(chunk, topic, subtopic, difficulty, created_by, near_duplicates, question_no)
+        totals = stats if totals is None else {key: totals[key] + stats[key] for key in totals}
+        totals['near_duplicate_pairs'] = totals['near_duplicate_pairs'][:MAX_REPORTED_PAIRS]
+        question_no += len(chunk)
+        if progress:
+            progress(totals)
+    return totals or {'received': 0, 'invalid': 0, 'duplicates': 0, 'existing': 0, 'near_duplicates': 0, 'saved': 0,
+                      'near_duplicate_pairs': []}
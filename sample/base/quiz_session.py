@@ -0,0 +1,46 @@
+"""Compact quiz state kept in the user's session.
+
+Only question ids and the user's answers are stored; question bodies are
+loaded on demand through question_bank.get_question_payloads().
+"""
+
+QUIZ_SESSION_KEY = 'quiz'
+NO_ANSWER = '-'
+
+def start_quiz_session(session, question_ids, topic, subtopic='', difficulty=''):
+    """Store a new quiz as an ordered id list plus empty answer state"""
+    session[QUIZ_SESSION_KEY] = {
+        'ids': list(question_ids),
+        'index': 0,
+        'correct': 0,       # bitmap, bit i set when question i was answered correctly
+        'answers': '',      # one letter per answered question, NO_ANSWER when skipped
+        'confidence': '',   # one digit (1-5) per answered question
+        'times': [],        # seconds spent per answered question
+        'topic': topic,
+        'subtopic': subtopic or 'All Subtopics',
+        'difficulty': difficulty or 'All Difficulties',
+    }
+
+def get_quiz_session(session):
+    return session.get(QUIZ_SESSION_KEY)
+
+def record_answer(session, user_answer, is_correct, confidence=3, time_taken=0):
+    """Append the answer for the current question and move to the next one"""
+    quiz = session[QUIZ_SESSION_KEY]
+    if is_correct:
+        quiz['correct'] |= 1 << quiz['index']
+    quiz['answers'] += user_answer if user_answer in ('A', 'B', 'C', 'D') else NO_ANSWER
+    quiz['confidence'] += str(min(max(confidence, 1), 5))
+    quiz['times'].append(time_taken)
+    quiz['index'] += 1
+    session.modified = True
+
+def is_answer_correct(quiz, index):
+    return bool(quiz['correct'] >> index & 1)
+
+def quiz_score(quiz):
+    """Number of correctly answered questions"""
+    return quiz['correct'].bit_count()
+
+def clear_quiz_session(session):
+    session.pop(QUIZ_SESSION_KEY, None)
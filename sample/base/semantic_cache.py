@@ -0,0 +1,166 @@
+"""Embedding-similarity cache in front of LLM calls, so paraphrased inputs reuse a response.
+
+Inputs are embedded by the NLP server's sentence-transformer (the one behind
+KeyBERT) and kept per call site in a row-normalized
+float32 matrix. A lookup is one brute-force matrix-vector product; the best
+match is served when its cosine similarity reaches the site's threshold
+(settings.LLM_SEMANTIC_CACHE_THRESHOLD, overridable per call site with
+'semantic_threshold'). Entries expire after settings.LLM_CACHE_TTL and the
+least recently used one is evicted when a site's matrix is full.
+
+When the NLP server isn't running the semantic layer is skipped rather than
+loading the model into every web worker; set LLM_SEMANTIC_CACHE_IN_PROCESS
+to embed in-process instead.
+
+The matrices are per process; llm_cache's exact-match cache in front of this
+one is shared by all workers.
+"""
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from . import nlp_server
+
+DEFAULT_THRESHOLD = 0.88
+DEFAULT_CAPACITY = 2000
+DEFAULT_TTL = 7 * 24 * 3600
+
+_caches = {}
+_lock = threading.Lock()
+_embedding_error = None
+
+class SemanticCache:
+    """Fixed-capacity matrix of input embeddings with their responses"""
+
+    def __init__(self, capacity, threshold, ttl):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self.vectors = None  # allocated on the first add, once the embedding size is known
+        self.texts = [None] * capacity
+        self.responses = [None] * capacity
+        self.created = np.zeros(capacity)
+        self.last_used = np.zeros(capacity)
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.hit_similarity = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+    def lookup(self, vector):
+        """Response of the most similar stored input, or None below the threshold"""
+        with self.lock:
+            if self.size:
+                scores = self.vectors[:self.size] @ vector
+                best = int(np.argmax(scores))
+                now = time.time()
+                if scores[best] >= self.threshold:
+                    if now - self.created[best] <= self.ttl:
+                        self.last_used[best] = now
+                        self.hits += 1
+                        self.hit_similarity += float(scores[best])
+                        return self.responses[best]
+                    self._remove(best)
+                    self.expired += 1
+            self.misses += 1
+            return None
+
+    def add(self, text, vector, response, llm_seconds):
+        """Store a generated response and the time the LLM took to produce it"""
+        with self.lock:
+            self.llm_calls += 1
+            self.llm_seconds += llm_seconds
+            if self.vectors is None:
+                self.vectors = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+            if self.size == self.capacity:
+                self._remove(int(np.argmin(self.last_used[:self.size])))
+                self.evictions += 1
+            row = self.size
+            self.vectors[row] = vector
+            self.texts[row] = text
+            self.responses[row] = response
+            self.created[row] = self.last_used[row] = time.time()
+            self.size += 1
+
+    def _remove(self, row):
+        # Move the last entry into the gap so rows [0, size) stay dense
+        last = self.size - 1
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            self.texts[row] = self.texts[last]
+            self.responses[row] = self.responses[last]
+            self.created[row] = self.created[last]
+            self.last_used[row] = self.last_used[last]
+        self.texts[last] = self.responses[last] = None
+        self.size = last
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        avg_llm_seconds = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+        return {
+            'size': self.size,
+            'capacity': self.capacity,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'mean_hit_similarity': round(self.hit_similarity / self.hits, 3) if self.hits else None,
+            'evictions': self.evictions,
+            'expired': self.expired,
+            'avg_llm_seconds': round(avg_llm_seconds, 3),
+            # Each hit saved roughly one average LLM call
+            'estimated_seconds_saved': round(self.hits * avg_llm_seconds, 1),
+        }
+
+def get_cache(site):
+    cache = _caches.get(site)
+    if cache is None:
+        with _lock:
+            cache = _caches.get(site)
+            if cache is None:
+                site_config = getattr(settings, 'LLM_CALL_SITES', {}).get(site, {})
+                cache = SemanticCache(
+                    capacity=getattr(settings, 'LLM_SEMANTIC_CACHE_SIZE', DEFAULT_CAPACITY),
+                    threshold=site_config.get('semantic_threshold', getattr(settings, 'LLM_SEMANTIC_CACHE_THRESHOLD', DEFAULT_THRESHOLD)),
+                    ttl=getattr(settings, 'LLM_CACHE_TTL', DEFAULT_TTL),
+                )
+                _caches[site] = cache
+    return cache
+
+def embed(text):
+    """Normalized embedding of text, or None when no embedding model is available in this process"""
+    global _embedding_error
+    if _embedding_error is not None:
+        return None
+    try:
+        in_process = getattr(settings, 'LLM_SEMANTIC_CACHE_IN_PROCESS', False)
+        vector = np.asarray(nlp_server.embeddings([text], fallback=in_process)[0], dtype=np.float32)
+    except nlp_server.NLPServerUnavailable:
+        return None
+    except ImportError as e:
+        # No sentence-transformer installed here; don't try again on every request
+        _embedding_error = str(e)
+        print(f"DEBUG: Semantic LLM cache disabled: {e}")
+        return None
+    except Exception as e:
+        print(f"DEBUG: Semantic LLM cache lookup skipped: {e}")
+        return None
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+def lookup(site, vector):
+    return get_cache(site).lookup(vector)
+
+def add(site, text, vector, response, llm_seconds):
+    get_cache(site).add(text, vector, response, llm_seconds)
+
+def cache_stats():
+    """Per-site statistics of this process's semantic caches"""
+    stats = {site: cache.stats() for site, cache in _caches.items()}
+    if _embedding_error is not None:
+        stats['disabled'] = _embedding_error
+    return stats
@@ -1,55 +1,177 @@
+import multiprocessing
+import os
 import PyPDF2
-import re
-from io import BytesIO
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from .mcq_parser import PARSER_VERSION, MCQParser
+from .pdf_cache import file_digest, read_entry, write_entry
 
-def extract_mcqs_from_pdf(pdf_file):
+# Upper bound on PDF text handed to keyword-based MCQ generation; only the chunks
+# questions are drawn from go through the models, so this mostly bounds memory
+AI_SOURCE_TEXT_LIMIT = 2000000
+
+def _extract_page_range(path, start, stop):
+    """Text of pages [start, stop) of the PDF at path; runs in a worker process"""
+    pdf_reader = PyPDF2.PdfReader(path)
+    return [(pdf_reader.pages[i].extract_text() or "") + "\n" for i in range(start, stop)]
+
+_extract_pool = None
+
+def _get_extract_pool(workers):
+    """Process pool shared by every extraction in this process, created on first use"""
+    global _extract_pool
+    if _extract_pool is None:
+        # spawn, not fork: forking a threaded web worker can deadlock the children
+        _extract_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return _extract_pool
+
+def _iter_pages_parallel(path, page_count, workers, pages_per_task):
+    """Yield page texts in order while page ranges are extracted by the pool.
+
+    At most two ranges per worker are in flight, so finished text never piles up
+    ahead of a slow consumer.
+    """
+    pool = _get_extract_pool(workers)
+    ranges = iter(range(0, page_count, pages_per_task))
+    pending = deque()
     try:
-        # Use PyPDF2 
-        pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_file.read()))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        print(f"Extracted text length: {len(text)}")
-        
-        # Multiple patterns to handle different formats
-        patterns = [
-            # Pattern 1: Standard format with Answer:
-            r"(\d+)\.\s*(.*?)\nA\)\s*(.*?)\nB\)\s*(.*?)\nC\)\s*(.*?)\nD\)\s*(.*?)\nAnswer:\s*([A-D])",
-            # Pattern 2: Format with (A), (B), (C), (D)
-            r"(\d+)\.\s*(.*?)\n\(A\)\s*(.*?)\n\(B\)\s*(.*?)\n\(C\)\s*(.*?)\n\(D\)\s*(.*?)\nAnswer:\s*([A-D])",
-            # Pattern 3: Format with a), b), c), d)
-            r"(\d+)\.\s*(.*?)\na\)\s*(.*?)\nb\)\s*(.*?)\nc\)\s*(.*?)\nd\)\s*(.*?)\nAnswer:\s*([A-D])",
-        ]
-        
-        mcqs = []
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
-            if matches:
-                print(f"Found {len(matches)} matches with pattern")
-                for match in matches:
-                    _, question, a, b, c, d, ans = match
-                    mcqs.append({
-                        "question": question.strip(),
-                        "option_a": a.strip(),
-                        "option_b": b.strip(),
-                        "option_c": c.strip(),
-                        "option_d": d.strip(),
-                        "correct_answer": ans.strip().upper()
-                    })
-                break  # Use first successful pattern
-        
-        # If no pattern matches, create sample MCQs for testing
-        if not mcqs:
-            print("No MCQs found, creating sample questions")
-            mcqs = create_sample_mcqs()
-        
-        return mcqs
-        
+        for start in islice(ranges, workers * 2):
+            pending.append(pool.submit(_extract_page_range, path, start, min(start + pages_per_task, page_count)))
+        while pending:
+            pages = pending.popleft().result()
+            for start in islice(ranges, 1):
+                pending.append(pool.submit(_extract_page_range, path, start, min(start + pages_per_task, page_count)))
+            yield from pages
+    finally:
+        for future in pending:
+            future.cancel()
+
+def _local_path(pdf_file):
+    """Filesystem path behind an upload spooled to disk or a file opened from media storage, if any"""
+    if hasattr(pdf_file, 'temporary_file_path'):
+        return pdf_file.temporary_file_path()
+    name = getattr(getattr(pdf_file, 'file', None), 'name', None)
+    return name if isinstance(name, str) and os.path.isabs(name) and os.path.isfile(name) else None
+
+def iter_pdf_pages(pdf_file):
+    """Yield the text of each page in order.
+
+    Files on local disk are split into page ranges for a process pool
+    (settings.PDF_EXTRACT_WORKERS); small in-memory uploads, single-worker
+    setups and pool failures extract serially in this process.
+    """
+    from django.conf import settings
+    global _extract_pool
+    workers = getattr(settings, 'PDF_EXTRACT_WORKERS', 1)
+    pages_per_task = getattr(settings, 'PDF_EXTRACT_PAGES_PER_TASK', 25)
+
+    pdf_file.seek(0)
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    page_count = len(pdf_reader.pages)
+    done = 0
+
+    path = _local_path(pdf_file)
+    if workers > 1 and path and page_count > pages_per_task:
+        try:
+            for page_text in _iter_pages_parallel(path, page_count, workers, pages_per_task):
+                done += 1
+                yield page_text
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Parallel PDF extraction failed, continuing in-process from page {done + 1}: {e}")
+            _extract_pool = None
+
+    # PdfReader reads the upload lazily instead of copying it
+    for i in range(done, page_count):
+        yield (pdf_reader.pages[i].extract_text() or "") + "\n"
+
+def iter_cached_pages(pdf_file, digest, cache_info=None):
+    """Page texts from the PDF cache, or extracted and written to it as they are read"""
+    cached = read_entry(digest, 'pages')
+    if cached is not None:
+        if cache_info is not None:
+            cache_info['hit'] = 'text'
+        yield from cached
+        return
+    with write_entry(digest, 'pages') as write:
+        for page_text in iter_pdf_pages(pdf_file):
+            write(page_text)
+            yield page_text
+
+def read_pdf_text(pdf_file, max_chars=None, cache_info=None):
+    """Text of the PDF, stopping once max_chars have been read.
+
+    Built from the same cached page texts as iter_mcqs_from_pdf, so a repeat
+    upload in either mode skips extraction. Stopping early leaves the page
+    entry unwritten, since it would be incomplete.
+    """
+    digest = file_digest(pdf_file)
+    if cache_info is not None:
+        cache_info.update(key=digest, hit=None)
+
+    parts = []
+    length = 0
+    pages = iter_cached_pages(pdf_file, digest, cache_info)
+    try:
+        for page_text in pages:
+            parts.append(page_text)
+            length += len(page_text)
+            if max_chars and length >= max_chars:
+                break
+    finally:
+        pages.close()
+    return "".join(parts)[:max_chars]
+
+def iter_mcqs_from_pdf(pdf_file, parser=None, cache_info=None):
+    """Yield MCQs page by page; pass an MCQParser to inspect unparsed lines afterwards.
+
+    Parsed MCQs and page texts are cached by file content, so a repeat upload
+    skips extraction; cache_info, if given, is filled with the cache key and
+    what was hit ('mcqs', 'text' or None).
+    """
+    parser = parser or MCQParser()
+    cache_info = {} if cache_info is None else cache_info
+    # Parses from an older parser version are simply never read again and age out of the cache
+    kind = f'mcqs-v{PARSER_VERSION}'
+    found = 0
+    try:
+        digest = file_digest(pdf_file)
+        cache_info.update(key=digest, hit=None)
+        cached = read_entry(digest, kind)
+        if cached is not None:
+            cache_info['hit'] = 'mcqs'
+            for record in cached:
+                if 'parser' in record:
+                    # Trailing summary record restores the unparsed line report
+                    parser.error_count = record['parser']['error_count']
+                    parser.errors = [tuple(error) for error in record['parser']['errors']]
+                    continue
+                found += 1
+                yield record
+        else:
+            with write_entry(digest, kind) as write:
+                for page_text in iter_cached_pages(pdf_file, digest, cache_info):
+                    for mcq in parser.feed(page_text):
+                        write(mcq)
+                        found += 1
+                        yield mcq
+                for mcq in parser.close():
+                    write(mcq)
+                    found += 1
+                    yield mcq
+                write({'parser': {'error_count': parser.error_count, 'errors': parser.errors}})
     except Exception as e:
         print(f"Error extracting MCQs: {e}")
-        return create_sample_mcqs()
+
+    print(f"Extracted {found} MCQs, {parser.error_count} unparsed lines (cache: {cache_info.get('hit') or 'miss'})")
+    # If nothing parses, create sample MCQs for testing
+    if not found:
+        print("No MCQs found, creating sample questions")
+        yield from create_sample_mcqs()
+
+def extract_mcqs_from_pdf(pdf_file):
+    return list(iter_mcqs_from_pdf(pdf_file))
 
 def create_sample_mcqs():
     """Create sample MCQs for testing when PDF extraction fails"""
@@ -0,0 +1,127 @@
+"""Concurrent load test for the chatbot endpoint, to compare WSGI and ASGI serving.
+
+Logs in once, then for each --concurrency level sends --requests POSTs to
+/chatbot/explain/ from that many threads and reports throughput and latency
+percentiles. Every request asks about a unique topic so the response caches
+don't answer it. Run the server with benchmarks.stub_settings, whose stub
+Gemini clients make each LLM call take LLM_STUB_SECONDS without using API
+quota, once per server type:
+
+    DJANGO_SETTINGS_MODULE=benchmarks.stub_settings LLM_STUB_SECONDS=1 gunicorn sample.wsgi -w 4
+    python benchmarks/chatbot_load_test.py --label wsgi --username admin --password ... --record benchmarks/results.jsonl
+
+    DJANGO_SETTINGS_MODULE=benchmarks.stub_settings LLM_STUB_SECONDS=1 uvicorn sample.asgi:application --workers 4 --port 8000
+    python benchmarks/chatbot_load_test.py --label asgi --username admin --password ... --record benchmarks/results.jsonl
+
+With four sync workers WSGI tops out near 4 requests per LLM-second; the ASGI
+workers keep every request in flight at once. --stream uses the Server-Sent
+Events endpoint instead and also reports time to the first text chunk, the
+latency users see while the rest of the explanation streams in.
+"""
+import argparse
+import http.cookiejar
+import json
+import statistics
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+def make_opener(base_url, username, password):
+    """urllib opener holding a logged-in session cookie and the CSRF token"""
+    cookies = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+    opener.open(f"{base_url}/login/").read()
+    csrf_token = next(cookie.value for cookie in cookies if cookie.name == 'csrftoken')
+    data = urllib.parse.urlencode({'username': username, 'password': password, 'csrfmiddlewaretoken': csrf_token}).encode()
+    opener.open(urllib.request.Request(f"{base_url}/login/", data=data, headers={'Referer': f"{base_url}/login/"})).read()
+    if not any(cookie.name == 'sessionid' for cookie in cookies):
+        raise SystemExit('Login failed; check --username and --password')
+    # Logging in rotates the CSRF token
+    return opener, next(cookie.value for cookie in cookies if cookie.name == 'csrftoken')
+
+def explain(opener, csrf_token, base_url, timeout, stream=False):
+    """One chatbot request; returns (seconds, seconds to first text chunk or None, ok)"""
+    body = json.dumps({'topic': f"load test topic {uuid.uuid4().hex}"}).encode()
+    path = '/chatbot/explain/stream/' if stream else '/chatbot/explain/'
+    request = urllib.request.Request(f"{base_url}{path}", data=body, headers={
+        'Content-Type': 'application/json',
+        'X-CSRFToken': csrf_token,
+        'Referer': f"{base_url}/chatbot/",
+    })
+    start = time.perf_counter()
+    first_text = None
+    try:
+        with opener.open(request, timeout=timeout) as response:
+            if not stream:
+                ok = json.loads(response.read()).get('success', False)
+            else:
+                ok = False
+                for line in response:
+                    if first_text is None and line.startswith(b'data: {"text"'):
+                        first_text = time.perf_counter() - start
+                    elif line.startswith(b'event: done'):
+                        ok = True
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, first_text, ok
+
+def _percentile(values, p):
+    return round(values[min(len(values) - 1, int(p * len(values)))], 3) if values else None
+
+def run_level(opener, csrf_token, base_url, concurrency, requests, timeout, stream=False):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: explain(opener, csrf_token, base_url, timeout, stream), range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds for seconds, _, ok in results if ok)
+    row = {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': sum(1 for _, _, ok in results if not ok),
+        'req_per_s': round(len(latencies) / elapsed, 2),
+        'p50_s': _percentile(latencies, 0.50),
+        'p95_s': _percentile(latencies, 0.95),
+        'max_s': round(latencies[-1], 3) if latencies else None,
+        'mean_s': round(statistics.mean(latencies), 3) if latencies else None,
+    }
+    if stream:
+        first_text = sorted(seconds for _, seconds, ok in results if ok and seconds is not None)
+        row['ttft_p50_s'] = _percentile(first_text, 0.50)
+        row['ttft_p95_s'] = _percentile(first_text, 0.95)
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--label', default='server', help='Name of the setup under test, e.g. wsgi or asgi')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50, 100, 200])
+    parser.add_argument('--requests', type=int, default=0, help='Requests per level (default 2x the concurrency)')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--stream', action='store_true', help='Use the Server-Sent Events endpoint and report time to first text')
+    parser.add_argument('--record', metavar='PATH', help='Append results as JSON lines to PATH')
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    opener, csrf_token = make_opener(base_url, args.username, args.password)
+
+    results = []
+    for concurrency in args.concurrency:
+        row = {'label': args.label, 'stream': args.stream,
+               **run_level(opener, csrf_token, base_url, concurrency, args.requests or 2 * concurrency, args.timeout, args.stream)}
+        results.append(row)
+        print('  '.join(f'{key}={value}' for key, value in row.items()), flush=True)
+
+    if args.record:
+        timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with open(args.record, 'a', encoding='utf-8') as f:
+            for row in results:
+                f.write(json.dumps({'timestamp': timestamp, 'benchmark': 'chatbot_load', **row}) + '\n')
+
+if __name__ == '__main__':
+    main()
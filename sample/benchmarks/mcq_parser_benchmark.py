@@ -0,0 +1,101 @@
+"""Throughput benchmark for base.mcq_parser over the text corpus in benchmarks/corpus.
+
+Each corpus file is repeated up to --size-mb and parsed --repeat times; the best
+run is reported in MB/s together with the MCQs found and unparsed lines.
+--baseline also times the three-regex extractor the parser replaced, and
+--record appends the results to a JSON-lines file so runs can be compared.
+
+    python benchmarks/mcq_parser_benchmark.py --size-mb 2 --baseline --record benchmarks/results.jsonl
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent))
+
+from base.mcq_parser import parse_mcqs  # noqa: E402
+
+CORPUS_DIR = BENCHMARK_DIR / 'corpus'
+
+# The patterns extract_mcqs_from_pdf used before the line parser, kept for comparison
+LEGACY_PATTERNS = [
+    r"(\d+)\.\s*(.*?)\nA\)\s*(.*?)\nB\)\s*(.*?)\nC\)\s*(.*?)\nD\)\s*(.*?)\nAnswer:\s*([A-D])",
+    r"(\d+)\.\s*(.*?)\n\(A\)\s*(.*?)\n\(B\)\s*(.*?)\n\(C\)\s*(.*?)\n\(D\)\s*(.*?)\nAnswer:\s*([A-D])",
+    r"(\d+)\.\s*(.*?)\na\)\s*(.*?)\nb\)\s*(.*?)\nc\)\s*(.*?)\nd\)\s*(.*?)\nAnswer:\s*([A-D])",
+]
+
+def legacy_parse(text):
+    for pattern in LEGACY_PATTERNS:
+        matches = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
+        if matches:
+            return matches
+    return []
+
+def load_corpus(size_mb):
+    """Each corpus file repeated up to roughly size_mb megabytes"""
+    corpus = {}
+    for path in sorted(CORPUS_DIR.glob('*.txt')):
+        sample = path.read_text(encoding='utf-8')
+        if not sample.endswith('\n'):
+            sample += '\n'
+        repeats = max(1, int(size_mb * 1024 * 1024 / len(sample.encode('utf-8'))))
+        corpus[path.stem] = sample * repeats
+    return corpus
+
+def best_time(func, text, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=1.0, help='Text size per corpus file (default 1 MB)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', action='store_true', help='Also time the legacy three-regex extractor')
+    parser.add_argument('--baseline-max-mb', type=float, default=0.25,
+                        help='Cap baseline input size; it is quadratic on adversarial text (default 0.25 MB)')
+    parser.add_argument('--record', metavar='PATH', help='Append results as JSON lines to PATH')
+    args = parser.parse_args()
+
+    results = []
+    for name, text in load_corpus(args.size_mb).items():
+        size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+        elapsed, (mcqs, mcq_parser) = best_time(parse_mcqs, text, args.repeat)
+        row = {
+            'corpus': name,
+            'size_mb': round(size_mb, 3),
+            'mb_per_s': round(size_mb / elapsed, 2),
+            'mcqs': len(mcqs),
+            'unparsed': mcq_parser.error_count,
+        }
+        if args.baseline:
+            baseline_text = text[:int(args.baseline_max_mb * 1024 * 1024)]
+            baseline_mb = len(baseline_text.encode('utf-8')) / (1024 * 1024)
+            baseline_elapsed, matches = best_time(legacy_parse, baseline_text, 1)
+            row['baseline_mb_per_s'] = round(baseline_mb / baseline_elapsed, 2)
+            row['baseline_mcqs'] = len(matches)
+        results.append(row)
+
+    columns = ['corpus', 'size_mb', 'mb_per_s', 'mcqs', 'unparsed'] + (['baseline_mb_per_s', 'baseline_mcqs'] if args.baseline else [])
+    print('  '.join(f'{column:>24}' if i == 0 else f'{column:>17}' for i, column in enumerate(columns)))
+    for row in results:
+        print('  '.join(f'{row[column]!s:>24}' if i == 0 else f'{row[column]!s:>17}' for i, column in enumerate(columns)))
+
+    if args.record:
+        timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with open(args.record, 'a', encoding='utf-8') as f:
+            for row in results:
+                f.write(json.dumps({'timestamp': timestamp, **row}) + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Sentence segmentation benchmark for the spaCy pipelines in base.nlp_models.
+
+The reference prose in benchmarks/corpus/prose is repeated up to --size-mb and
+segmented with each pipeline through split_sentences_batch; the best of
+--repeat runs is reported in sentences per second, with the share of the full
+pipeline's sentence boundaries each trimmed pipeline reproduces. 'full' is the
+pipeline MCQ generation used before (en_core_web_sm with the parser). Needs
+spaCy and en_core_web_sm installed (or another trained pipeline passed with
+--model); --record appends the results as JSON lines.
+
+    python benchmarks/sentence_segmentation_benchmark.py --size-mb 1 --record benchmarks/results.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent))
+
+from base.nlp_models import SENTENCE_PIPELINES, SPACY_MODEL, load_sentence_pipeline, split_sentences_batch  # noqa: E402
+
+CORPUS_DIR = BENCHMARK_DIR / 'corpus' / 'prose'
+
+def load_corpus(size_mb):
+    """The reference prose repeated up to roughly size_mb megabytes"""
+    sample = '\n\n'.join(path.read_text(encoding='utf-8').strip() for path in sorted(CORPUS_DIR.glob('*.txt'))) + '\n\n'
+    repeats = max(1, int(size_mb * 1024 * 1024 / len(sample.encode('utf-8'))))
+    return sample * repeats
+
+def boundaries(sentences):
+    """Character offsets where sentences end, ignoring whitespace so pipelines can be compared"""
+    offsets = set()
+    position = 0
+    for sentence in sentences:
+        position += len(''.join(sentence.split()))
+        offsets.add(position)
+    return offsets
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=0.5, help='Text size (default 0.5 MB)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pipelines', nargs='+', choices=SENTENCE_PIPELINES, default=list(SENTENCE_PIPELINES))
+    parser.add_argument('--model', default=SPACY_MODEL, help=f'spaCy package or path (default {SPACY_MODEL})')
+    parser.add_argument('--record', metavar='PATH', help='Append results as JSON lines to PATH')
+    args = parser.parse_args()
+
+    text = load_corpus(args.size_mb)
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    # Documents of the size generate_mcqs hands over, so batching behaves as in production
+    documents = [text[i:i + 20000] for i in range(0, len(text), 20000)]
+
+    results = []
+    reference = None
+    for name in ['full'] + [name for name in args.pipelines if name != 'full']:
+        start = time.perf_counter()
+        nlp = load_sentence_pipeline(name, args.model)
+        load_seconds = time.perf_counter() - start
+
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            sentences = [sent for doc in split_sentences_batch(documents, nlp) for sent in doc]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        found = boundaries(sentences)
+        if reference is None:
+            reference = found
+        if name not in args.pipelines:
+            continue
+        results.append({
+            'model': args.model if name != 'sentencizer' else 'blank:en',
+            'pipeline': name,
+            'size_mb': round(size_mb, 3),
+            'load_s': round(load_seconds, 2),
+            'sentences': len(sentences),
+            'sents_per_s': round(len(sentences) / best),
+            'mb_per_s': round(size_mb / best, 2),
+            'boundary_recall': round(len(found & reference) / len(reference), 3),
+        })
+
+    columns = ['pipeline', 'size_mb', 'load_s', 'sentences', 'sents_per_s', 'mb_per_s', 'boundary_recall']
+    print('  '.join(f'{column:>15}' for column in columns))
+    for row in results:
+        print('  '.join(f'{row[column]!s:>15}' for column in columns))
+
+    if args.record:
+        timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with open(args.record, 'a', encoding='utf-8') as f:
+            for row in results:
+                f.write(json.dumps({'timestamp': timestamp, 'benchmark': 'sentence_segmentation', **row}) + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Stand-in Gemini clients for load tests, installed by benchmarks/stub_settings.py.
+
+Every call returns a canned reply after settings.LLM_STUB_SECONDS, so the
+server's concurrency can be measured without API quota or network jitter.
+Streaming spreads the same delay over one chunk per word.
+"""
+import asyncio
+import time
+from django.conf import settings
+
+def _reply(request):
+    import google.ai.generativelanguage as glm
+    prompt = request.contents[0].parts[0].text
+    return f"[stub {request.model} reply] {prompt[:80]}", glm
+
+def _response(glm, text):
+    return glm.GenerateContentResponse(candidates=[glm.Candidate(content=glm.Content(parts=[glm.Part(text=text)]))])
+
+class StubClient:
+    def generate_content(self, request, retry=None, timeout=None):
+        text, glm = _reply(request)
+        time.sleep(settings.LLM_STUB_SECONDS)
+        return _response(glm, text)
+
+class StubAsyncClient:
+    async def generate_content(self, request, retry=None, timeout=None):
+        text, glm = _reply(request)
+        await asyncio.sleep(settings.LLM_STUB_SECONDS)
+        return _response(glm, text)
+
+    async def stream_generate_content(self, request, retry=None, timeout=None):
+        text, glm = _reply(request)
+        words = text.split(' ')
+
+        async def chunks():
+            for i, word in enumerate(words):
+                await asyncio.sleep(settings.LLM_STUB_SECONDS / len(words))
+                yield _response(glm, word if i == 0 else ' ' + word)
+        return chunks()
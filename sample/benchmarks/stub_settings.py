@@ -0,0 +1,16 @@
+"""Project settings with Gemini replaced by the stub clients in benchmarks/stub_gemini.py.
+
+For load tests only; run the server from the project directory:
+
+    DJANGO_SETTINGS_MODULE=benchmarks.stub_settings LLM_STUB_SECONDS=1 gunicorn sample.wsgi -w 4
+"""
+import os
+
+from sample.settings import *  # noqa: F401,F403
+
+GEMINI_CLIENT_CLASSES = {
+    'sync': 'benchmarks.stub_gemini.StubClient',
+    'async': 'benchmarks.stub_gemini.StubAsyncClient',
+}
+# Seconds each stubbed LLM call takes
+LLM_STUB_SECONDS = float(os.environ.get('LLM_STUB_SECONDS', '1'))
@@ -139,7 +139,66 @@ CACHES = {
         'OPTIONS': {
             'MAX_ENTRIES': 1000,
         }
-    }
+    },
+    # LLM responses shared by all workers on the host, see base/llm_cache.py
+    'llm': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('LLM_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'llm')),
+        'TIMEOUT': 7 * 24 * 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 4,  # drop a quarter of the entries when full
+        }
+    },
+}
+LLM_CACHE_TTL = 7 * 24 * 3600
+# Paraphrase matching for chatbot_explain and explain_insight: cosine similarity needed to reuse a response, entries per call site
+LLM_SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('LLM_SEMANTIC_CACHE_THRESHOLD', 0.88))
+LLM_SEMANTIC_CACHE_SIZE = 2000
+# Embeddings come from the NLP server; True loads the sentence-transformer into each web worker when it's down
+LLM_SEMANTIC_CACHE_IN_PROCESS = os.environ.get('LLM_SEMANTIC_CACHE_IN_PROCESS', '').lower() in ('1', 'true', 'yes')
+
+# PDF ingestion: worker processes for page-level text extraction (1 extracts in the request process)
+PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', min(os.cpu_count() or 1, 4)))
+PDF_EXTRACT_PAGES_PER_TASK = 25
+
+# Extracted text and parsed MCQs, keyed by the SHA-256 of the PDF and evicted least recently used first
+PDF_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'pdf')
+PDF_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Ingestion worker: a running job whose heartbeat is older than this many seconds was
+# abandoned by a dead worker and is re-queued, or failed once it has used up its attempts
+INGESTION_JOB_STALE_SECONDS = 300
+INGESTION_JOB_MAX_ATTEMPTS = 3
+
+# Local NLP inference server (manage.py run_nlp_server); MCQ generation runs the models in-process when it's not up
+NLP_SERVER_SOCKET = os.environ.get('NLP_SERVER_SOCKET', '/tmp/smart-quizzer-nlp.sock')
+NLP_SERVER_TIMEOUT = 60
+
+# spaCy pipeline used for sentence segmentation: 'senter' (default), 'sentencizer' (rule-based) or 'full'
+SPACY_SENTENCE_PIPELINE = os.environ.get('SPACY_SENTENCE_PIPELINE', 'senter')
+
+# Threads building MCQs from document chunks in ml_utils.generate_mcqs
+MCQ_GENERATION_WORKERS = int(os.environ.get('MCQ_GENERATION_WORKERS', min(os.cpu_count() or 1, 4)))
+
+# Per-topic term embeddings used to pick MCQ distractors (base/distractors.py)
+DISTRACTOR_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'distractors')
+DISTRACTOR_VOCAB_SIZE = 5000
+
+# Gemini: one client per process (base/gemini.py); each call site picks a model tier, timeout (seconds) and retry count
+# Read from the variable documented in .env.example; never commit a key here
+GEMINI_API_KEY = os.environ.get('GOOGLE_AI_API_KEY', '')
+LLM_MODEL_TIERS = {
+    'fast': os.environ.get('LLM_FAST_MODEL', 'gemini-2.5-flash'),
+    'quality': os.environ.get('LLM_QUALITY_MODEL', 'gemini-2.5-pro'),
+}
+LLM_CALL_SITES = {
+    'chatbot_explain': {'tier': 'fast', 'timeout': 30, 'retries': 1},
+    'explain_insight': {'tier': 'fast', 'timeout': 20, 'retries': 1},
+    'progress_insights': {'tier': 'quality', 'timeout': 60, 'retries': 2},
+    'dashboard_recommendations': {'tier': 'quality', 'timeout': 60, 'retries': 2},
+    'custom_quiz': {'tier': 'quality', 'timeout': 120, 'retries': 2},
+    'quiz_generation': {'tier': 'quality', 'timeout': 180, 'retries': 2},
 }
 
 # Default primary key field type
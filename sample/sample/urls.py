@@ -35,6 +35,7 @@ urlpatterns = [
     path('start_quiz/', views.start_quiz_view, name='start_quiz'),
     path('quiz_question/', views.quiz_question_view, name='quiz_question'),
     path('process_answer/', views.process_answer_view, name='process_answer'),
+    path('submit_quiz/', views.submit_quiz_view, name='submit_quiz'),
     path('progress/', views.progress_view, name='progress'),
     path('content_moderation/', views.content_moderation_view, name='content_moderation'),
     # path('topics/', views.topics_view, name='topics'),
@@ -48,6 +49,7 @@ urlpatterns = [
     path('rate-insight/', views.rate_insight_view, name='rate_insight'),
     path('chatbot/', views.chatbot_view, name='chatbot'),
     path('chatbot/explain/', views.chatbot_explain, name='chatbot_explain'),
+    path('chatbot/explain/stream/', views.chatbot_explain_stream, name='chatbot_explain_stream'),
     path('browse-topics/', views.browse_topics_view, name='browse_topics'),
     path('learning-path/<str:path_name>/', views.learning_path_detail_view, name='learning_path_detail'),
     path('start-learning-path/<str:path_name>/', views.start_learning_path_view, name='start_learning_path'),
@@ -55,6 +57,8 @@ urlpatterns = [
     path('topic-requests-admin/', views.topic_requests_admin_view, name='topic_requests_admin'),
     path('reports/', views.reports_view, name='reports'),
     path('generate_ai_quiz/', views.generate_ai_quiz, name='generate_ai_quiz'),
+    path('api/ingestion-jobs/<int:job_id>/', views.ingestion_job_status, name='ingestion_job_status'),
+    path('api/llm-cache-stats/', views.llm_cache_stats, name='llm_cache_stats'),
     path('view_ai_pdfs/', views.view_ai_pdfs, name='view_ai_pdfs'),
     path('view_admin_pdfs/', views.view_admin_pdfs, name='view_admin_pdfs'),
     path('view_questions/<str:topic>/<str:subtopic>/', views.view_questions, name='view_questions'),
@@ -63,6 +67,7 @@ urlpatterns = [
     path('api/real-time-analytics/', views.real_time_analytics_api, name='real_time_analytics_api'),
     path('api/user-performance/', views.user_performance_api, name='user_performance_api'),
     path('api/user-growth-data/', views.get_user_growth_data_api, name='user_growth_data_api'),
+    path('api/quiz-results/', views.quiz_results_api, name='quiz_results_api'),
     # User management endpoints
     path('admin/edit-user/', views.edit_user_view, name='edit_user'),
     path('admin/block-user/', views.block_user_view, name='block_user'),